@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # the CloudinaryField models have imported the SDK by now; only configure it
+        import cloudinary
+
+        cloudinary.config(**getattr(settings, 'CLOUDINARY', {}))
+
+        from . import openapi  # noqa: F401 (registers the schema artifact check)
@@ -0,0 +1,191 @@
+"""
+JWT authentication without a users.User SELECT on every request.
+
+``CachedJWTAuthentication`` keeps recently seen users in a small in-process
+LRU (``AUTH_USER_CACHE['MAX_SIZE']`` entries, ``TTL`` seconds). Entries are
+keyed by user id and the user's auth version; users.signals evicts a user
+on save and bumps the version on a password change, a change of
+is_active / is_staff / is_superuser, or delete.
+With ``AUTH_USER_CACHE['SHARED_CACHE']`` naming a cache alias (Redis in
+production) the version lives there, so a revocation in one process is
+seen by all of them; profile edits elsewhere show up within the TTL.
+A version missing from that cache (first use, or evicted) is seeded from
+the clock, which fails closed: tokens issued before have to be renewed.
+
+``StatelessJWTAuthentication`` goes further: it builds the user from the
+claims ``add_user_claims`` puts in the token (``User.from_db`` with every
+other field deferred), so only touching a non-claim attribute hits the
+database. Tokens issued before a revocation are rejected through the
+``ver`` claim. Tokens without the claims fall back to the cached path.
+Trusting the claims needs the versions in a shared cache: without
+``SHARED_CACHE`` a demotion in one process wouldn't reach the others, so
+every request looks the user up in the database instead.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# token claims the stateless mode builds the user from (besides the user id claim)
+CLAIM_FIELDS = ('email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser')
+VERSION_CLAIM = 'ver'
+
+
+def get_config():
+    return {'TTL': 60, 'MAX_SIZE': 1024, 'SHARED_CACHE': None, **getattr(settings, 'AUTH_USER_CACHE', {})}
+
+
+class UserCache:
+    """Thread-safe LRU of user objects with a per-entry expiry."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, user_id, version):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[0] != version or entry[1] < now:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            # a copy per request, so a view mutating request.user can't leak into the cache
+            return copy.copy(entry[2])
+
+    def set(self, user_id, version, user):
+        config = get_config()
+        with self.lock:
+            self.entries[user_id] = (version, time.monotonic() + config['TTL'], copy.copy(user))
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > config['MAX_SIZE']:
+                self.entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+
+user_cache = UserCache()
+_local_versions = {}
+
+
+def _key(user_id):
+    # simplejwt puts the id in tokens as a string; signals see the model's int
+    return str(user_id)
+
+
+def _version_key(user_id):
+    return f'auth-user-version:{_key(user_id)}'
+
+
+def _seed_version(cache, key):
+    # like the catalog version: a missing (evicted) key restarts from the clock, past every
+    # version a token was issued with, so eviction revokes tokens instead of reviving revoked ones
+    seed = time.time_ns()
+    cache.add(key, seed, timeout=None)
+    return cache.get(key, seed)
+
+
+def get_auth_version(user_id):
+    alias = get_config()['SHARED_CACHE']
+    if alias:
+        cache, key = caches[alias], _version_key(user_id)
+        version = cache.get(key)
+        return _seed_version(cache, key) if version is None else version
+    return _local_versions.get(_key(user_id), 0)
+
+
+def invalidate_user(user_id, revoke=False):
+    """Drop the cached user; with ``revoke`` also invalidate every token issued so far."""
+    user_cache.evict(_key(user_id))
+    if not revoke:
+        return
+    alias = get_config()['SHARED_CACHE']
+    if alias:
+        cache = caches[alias]
+        key = _version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # evicted or never set: a fresh seed is already past every issued token
+            _seed_version(cache, key)
+    else:
+        _local_versions[_key(user_id)] = _local_versions.get(_key(user_id), 0) + 1
+
+
+def add_user_claims(token, user):
+    """Put what StatelessJWTAuthentication needs into ``token`` (a RefreshToken or AccessToken)."""
+    for name in CLAIM_FIELDS:
+        token[name] = getattr(user, name)
+    token[VERSION_CLAIM] = get_auth_version(user.pk)
+    return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from exc
+
+        version = get_auth_version(user_id)
+        user = user_cache.get(_key(user_id), version)
+        if user is None:
+            # the stock lookup, with its not-found / inactive / revoked checks
+            user = super().get_user(validated_token)
+            user_cache.set(_key(user_id), version, user)
+        else:
+            self.check_user(user, validated_token)
+        return user
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and (
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+
+class StatelessJWTAuthentication(CachedJWTAuthentication):
+    def get_user(self, validated_token):
+        if not get_config()['SHARED_CACHE']:
+            # per-process versions can't revoke claims issued (or cached) elsewhere
+            return JWTAuthentication.get_user(self, validated_token)
+        claims = [api_settings.USER_ID_CLAIM, VERSION_CLAIM, *CLAIM_FIELDS]
+        if any(claim not in validated_token for claim in claims):
+            # issued before the claims existed
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if validated_token[VERSION_CLAIM] < get_auth_version(user_id):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        model = get_user_model()
+        id_field = model._meta.get_field(api_settings.USER_ID_FIELD)
+        data = {id_field.attname: id_field.to_python(user_id),
+                **{name: validated_token[name] for name in CLAIM_FIELDS}}
+        # from_db marks every field not given as deferred (loaded on first access);
+        # values go in concrete field order
+        names = [field.attname for field in model._meta.concrete_fields if field.attname in data]
+        return model.from_db(router.db_for_read(model), names, [data[name] for name in names])
@@ -0,0 +1,98 @@
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints.
+
+Validators come from one aggregate query (count, max id, max updated_at)
+over the same queryset the view would serialize, so a polling client that
+sends ``If-None-Match`` gets a 304 without the rows ever being loaded or
+run through a serializer.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return 'W/' + quote_etag(digest[:32])
+
+
+def not_modified(request, etag, last_modified=None):
+    """Return a 304 Response if the client's copy is still fresh, else None."""
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        # weak comparison: strip W/ on both sides
+        wanted = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        if '*' in wanted or etag.removeprefix('W/') in wanted:
+            return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+        return None
+    if last_modified is not None:
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if since is not None and int(last_modified.timestamp()) <= since:
+            return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+    return None
+
+
+def set_validators(response, etag, last_modified=None):
+    if response.status_code not in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        return response
+    if etag and not response.has_header('ETag'):
+        response['ETag'] = etag
+    if last_modified is not None and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag/Last-Modified to list and retrieve, answering 304 when they match.
+
+    ``etag_updated_field`` names the model's auto_now column (None if it has
+    none); views can override ``get_list_validators`` /
+    ``get_object_validators`` with something cheaper.
+    """
+    etag_updated_field = 'updated_at'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.get_list_validators(request, queryset)
+        return (not_modified(request, etag, last_modified)
+                or set_validators(super().list(request, *args, **kwargs), etag, last_modified))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        etag, last_modified = self.get_object_validators(request, kwargs[lookup_url_kwarg])
+        if etag is None:
+            # let the normal path raise the 404
+            return super().retrieve(request, *args, **kwargs)
+        return (not_modified(request, etag, last_modified)
+                or set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified))
+
+    def _user_part(self, request):
+        return request.user.pk if request.user.is_authenticated else 'anon'
+
+    def get_list_validators(self, request, queryset):
+        aggregates = {'count': Count('pk'), 'max_pk': Max('pk')}
+        if self.etag_updated_field:
+            aggregates['last_modified'] = Max(self.etag_updated_field)
+        row = queryset.order_by().aggregate(**aggregates)
+        last_modified = row.get('last_modified')
+        etag = make_etag(request.get_full_path(), self._user_part(request),
+                         row['count'], row['max_pk'], last_modified)
+        return etag, last_modified
+
+    def get_object_validators(self, request, lookup):
+        queryset = self.get_queryset().filter(**{self.lookup_field: lookup}).order_by()
+        if self.etag_updated_field:
+            row = queryset.values_list('pk', self.etag_updated_field).first()
+        else:
+            row = queryset.values_list('pk', 'pk').first()
+        if row is None:
+            return None, None
+        pk, updated = row
+        last_modified = updated if self.etag_updated_field else None
+        return make_etag(request.get_full_path(), self._user_part(request), pk, updated), last_modified
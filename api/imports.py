@@ -0,0 +1,245 @@
+"""
+Bulk catalog import (``manage.py import_catalog``).
+
+Rows are streamed from CSV or JSONL in fixed-size chunks, so memory use
+depends on ``chunk_size``, not on the file. Each chunk is validated with
+the resource's API serializer (``many=True``), then upserted on a natural
+key (Service.title, Product.name):
+
+* PostgreSQL: the chunk is ``COPY``-ed into a temp table and merged with
+  one ``UPDATE ... FROM`` and one ``INSERT ... SELECT ... WHERE NOT EXISTS``.
+* other backends: existing keys are fetched in one query, then matched
+  rows are upserted on their pk and the rest ``bulk_create``-d.
+
+An existing row only gets the columns the import row supplies (a blank CSV
+cell or a missing JSON key leaves the stored value alone), so updates are
+grouped by the set of supplied columns. Lines that can't be parsed are
+reported with their line number like rows that fail validation.
+
+Bulk writes skip post_save, so search vectors are refreshed per chunk here.
+"""
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import JSONField
+from django.utils import timezone
+
+from api import search
+
+# bulk_update builds one CASE per column per batch; big batches make that slower, not faster
+BULK_UPDATE_BATCH = 200
+
+
+@dataclass
+class Resource:
+    model: type
+    serializer_class: type
+    key: str
+    fields: tuple
+
+
+def get_resources():
+    from service.models import Service
+    from service.serializers import ServiceSerializer
+    from shop.models import Product
+    from shop.serializers import ProductSerializer
+
+    return {
+        # ratings are derived from reviews and images go through the media pipeline,
+        # so neither is importable
+        'service': Resource(Service, ServiceSerializer, 'title', ('title', 'description', 'price', 'duration_minutes')),
+        'product': Resource(Product, ProductSerializer, 'name', ('name', 'description', 'price')),
+    }
+
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    created: int = 0
+    updated: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows_per_second(self):
+        return round(self.read / self.seconds, 1) if self.seconds else None
+
+
+@dataclass
+class UnreadableRow:
+    """Stands in for a line that couldn't be parsed, so it is reported with the invalid rows."""
+    errors: dict
+
+
+def read_rows(fh, fmt):
+    """Yield (line number, dict or UnreadableRow) from a CSV (with header) or JSONL stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(fh)
+        for row in reader:
+            # empty CSV cells mean "not given", not ""
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+    elif fmt == 'jsonl':
+        for number, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                yield number, UnreadableRow({'non_field_errors': [f"Invalid JSON: {exc}"]})
+    else:
+        raise ValueError(f"Unsupported format {fmt!r}")
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def validate(resource, rows):
+    """Return (validated rows restricted to resource.fields, [(line, errors)])."""
+    unreadable = [(line, row.errors) for line, row in rows if isinstance(row, UnreadableRow)]
+    rows = [(line, row) for line, row in rows if not isinstance(row, UnreadableRow)]
+    data = [row for _line, row in rows]
+    serializer = resource.serializer_class(data=data, many=True)
+    if serializer.is_valid():
+        valid, errors = serializer.validated_data, unreadable
+    else:
+        errors = sorted(unreadable + [(line, error) for (line, _row), error in zip(rows, serializer.errors) if error],
+                        key=lambda entry: entry[0])
+        good = [row for row, error in zip(data, serializer.errors) if not error]
+        serializer = resource.serializer_class(data=good, many=True)
+        serializer.is_valid(raise_exception=True)
+        valid = serializer.validated_data
+
+    # last row wins when a chunk repeats a key
+    by_key = {}
+    for item in valid:
+        by_key[item[resource.key]] = {name: item[name] for name in resource.fields if name in item}
+    return list(by_key.values()), errors
+
+
+def _copy_row(columns, obj):
+    """COPY text for every column of ``obj``, defaults and auto_now filled in like save() would."""
+    values = []
+    for f in columns:
+        value = f.pre_save(obj, add=True)
+        if value is None:
+            values.append('\\N')
+        elif isinstance(f, JSONField):
+            values.append(json.dumps(value))
+        else:
+            values.append(f.get_db_prep_save(value, connection))
+    return values
+
+
+def _copy_from(cursor, sql, buffer):
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    if is_psycopg3:
+        # the driver DB_POOL_MAX_SIZE needs (settings_production)
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+    else:
+        cursor.copy_expert(sql, buffer)
+
+
+def upsert_copy(resource, rows):
+    """PostgreSQL: COPY into a temp table and merge. Returns (created pks, updated pks)."""
+    model = resource.model
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns = [f for f in model._meta.concrete_fields if not f.primary_key]
+    names = [connection.ops.quote_name(f.column) for f in columns]
+    key = connection.ops.quote_name(model._meta.get_field(resource.key).column)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    # key values per set of supplied fields; each set updates only its own columns
+    groups = defaultdict(list)
+    for data in rows:
+        groups[frozenset(data)].append(data[resource.key])
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for data in rows:
+        writer.writerow(_copy_row(columns, model(**data)))
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE TEMP TABLE import_stage ON COMMIT DROP AS "
+                       f"SELECT {', '.join(names)} FROM {table} WITH NO DATA")
+        _copy_from(cursor, f"COPY import_stage ({', '.join(names)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                   buffer)
+        updated = []
+        for supplied, keys in groups.items():
+            update_columns = [connection.ops.quote_name(f.column) for f in columns
+                              if f.name in supplied or getattr(f, 'auto_now', False)]
+            cursor.execute(f"UPDATE {table} AS t SET {', '.join(f'{c} = s.{c}' for c in update_columns)} "
+                           f"FROM import_stage AS s WHERE t.{key} = s.{key} AND s.{key} = ANY(%s) "
+                           f"RETURNING t.{pk}", [keys])
+            updated.extend(row_id for (row_id,) in cursor.fetchall())
+        cursor.execute(f"INSERT INTO {table} ({', '.join(names)}) "
+                       f"SELECT {', '.join(f's.{c}' for c in names)} FROM import_stage AS s "
+                       f"WHERE NOT EXISTS (SELECT 1 FROM {table} AS t WHERE t.{key} = s.{key}) RETURNING {pk}")
+        created = [row_id for (row_id,) in cursor.fetchall()]
+        cursor.execute("DROP TABLE import_stage")
+    return created, updated
+
+
+def upsert_orm(resource, rows):
+    """Any backend: one lookup for existing keys, then an upsert on pk and a bulk_create."""
+    model = resource.model
+    existing = dict(model.objects
+                    .filter(**{f"{resource.key}__in": [row[resource.key] for row in rows]})
+                    .values_list(resource.key, 'pk'))
+    auto_now = [f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+    now = timezone.now()
+
+    # updates grouped by the fields they supply; the others keep their stored values
+    to_update, to_create = defaultdict(list), []
+    for data in rows:
+        pk = existing.get(data[resource.key])
+        if pk is None:
+            to_create.append(model(**data))
+        else:
+            to_update[frozenset(data)].append(model(pk=pk, **data, **{name: now for name in auto_now}))
+
+    updated = []
+    for supplied, objs in to_update.items():
+        update_fields = sorted(supplied | set(auto_now))
+        if connection.features.supports_update_conflicts_with_target:
+            # INSERT ... ON CONFLICT (id) DO UPDATE: same effect as bulk_update without its CASE building
+            model.objects.bulk_create(objs, update_conflicts=True, unique_fields=[model._meta.pk.name],
+                                      update_fields=update_fields)
+        else:
+            model.objects.bulk_update(objs, update_fields, batch_size=BULK_UPDATE_BATCH)
+        updated.extend(obj.pk for obj in objs)
+    created = model.objects.bulk_create(to_create)
+    return [obj.pk for obj in created], updated
+
+
+def import_rows(resource, rows, chunk_size=1000, dry_run=False, on_chunk=None):
+    """Validate and upsert ``rows`` ((line, dict) pairs) chunk by chunk."""
+    report = ImportReport()
+    upsert = upsert_copy if search.is_postgres() else upsert_orm
+    started = time.perf_counter()
+    for chunk in chunked(rows, chunk_size):
+        report.read += len(chunk)
+        valid, errors = validate(resource, chunk)
+        report.invalid += len(errors)
+        report.errors.extend(errors[:max(0, 100 - len(report.errors))])
+        if valid and not dry_run:
+            with transaction.atomic():
+                created, updated = upsert(resource, valid)
+                search.refresh_search_vector(resource.model, created + updated)
+            report.created += len(created)
+            report.updated += len(updated)
+        if on_chunk:
+            on_chunk(report)
+    report.seconds = time.perf_counter() - started
+    return report
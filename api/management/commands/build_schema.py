@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import openapi
+
+
+class Command(BaseCommand):
+    help = ("Generate the OpenAPI schema once and write it to API_SCHEMA_DIR (openapi.json and "
+            "openapi.yaml), stamped with the urlconf fingerprint. Commit the result.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=('all', *openapi.FORMATS), default='all')
+        parser.add_argument('--check', action='store_true',
+                            help="Don't write; exit non-zero if the artifacts are missing or out of date (for CI).")
+
+    def handle(self, *args, **options):
+        formats = openapi.FORMATS if options['format'] == 'all' else (options['format'],)
+        fingerprint = openapi.fingerprint()
+        stale = []
+        for fmt, content in openapi.build(formats, fingerprint).items():
+            path = openapi.artifact_path(fmt)
+            current = path.read_bytes() if path.exists() else None
+            if content == current:
+                self.stdout.write(f"{path}: up to date")
+            elif options['check']:
+                stale.append(str(path))
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(content)
+                self.stdout.write(self.style.SUCCESS(f"{path}: written ({len(content)} bytes, urlconf {fingerprint})"))
+        if stale:
+            raise CommandError(f"Out of date: {', '.join(stale)}; run manage.py build_schema")
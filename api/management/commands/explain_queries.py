@@ -0,0 +1,122 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.urls import router
+from users.models import User
+
+# representative list requests per router basename; every other viewset gets a plain list
+PARAMS = {
+    'service': [{}, {'ordering': '-average_rating'}, {'ordering': 'price'}, {'q': 'clean'}],
+    'order': [{}],
+    'review': [{}],
+    'product': [{}],
+    'cart-item': [{}],
+}
+# a second page exercises the keyset seek predicate as well as the first page's ORDER BY ... LIMIT
+FOLLOW_NEXT = True
+
+SEQ_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    # "SCAN t USING [COVERING] INDEX i" walks an index; a bare "SCAN t" reads the table
+    'sqlite': re.compile(r'\bSCAN (\w+)$', re.MULTILINE),
+}
+SORT = {
+    'postgresql': re.compile(r'\bSort\b'),
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+}
+
+
+class Command(BaseCommand):
+    help = ("EXPLAIN the SQL behind each routed viewset's list endpoint under representative "
+            "parameters and flag sequential scans and sorts that no index serves.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Email of the user to run as (default: first superuser, else first user).")
+        parser.add_argument('--allow-seqscan', action='store_true',
+                            help="PostgreSQL: don't disable enable_seqscan. By default it is turned off so "
+                                 "small dev tables still show whether an index could be used.")
+        parser.add_argument('--fail', action='store_true', help="Exit non-zero if anything was flagged (for CI).")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN:
+            raise CommandError(f"EXPLAIN parsing isn't implemented for {vendor}")
+        user = self.get_user(options['user'])
+        # ALLOWED_HOSTS doesn't include the factory's default "testserver"
+        factory = APIRequestFactory(HTTP_HOST='127.0.0.1')
+        flagged = 0
+
+        for prefix, viewset, basename in router.registry:
+            view = viewset.as_view({'get': 'list'})
+            for params in PARAMS.get(basename, [{}]):
+                label = f"/{prefix}/" + (f"?{'&'.join(f'{k}={v}' for k, v in params.items())}" if params else '')
+                queries, response = self.capture(factory, view, f"/api/v1/{prefix}/", params, user)
+                if response.status_code != 200:
+                    self.stdout.write(f"{label}: HTTP {response.status_code}, skipped")
+                    continue
+                next_link = response.data.get('next') if isinstance(response.data, dict) else None
+                if FOLLOW_NEXT and next_link:
+                    more, _response = self.capture(factory, view, next_link, None, user)
+                    queries += more
+
+                for sql in queries:
+                    plan = self.explain(sql, options['allow_seqscan'])
+                    problems = [f"seq scan on {table}" for table in self.seq_scans(vendor, sql, plan)]
+                    if SORT[vendor].search(plan):
+                        problems.append("sort")
+                    if problems:
+                        flagged += 1
+                        self.stdout.write(self.style.WARNING(f"{label}: {', '.join(problems)}"))
+                        self.stdout.write(f"    {sql}")
+                        if options['verbosity'] > 1:
+                            self.stdout.write('    ' + plan.replace('\n', '\n    '))
+                    elif options['verbosity'] > 1:
+                        self.stdout.write(f"{label}: ok  {sql[:120]}")
+
+        if flagged and options['fail']:
+            raise CommandError(f"{flagged} queries flagged")
+        self.stdout.write(self.style.SUCCESS(f"Done, {flagged} queries flagged"))
+
+    def get_user(self, email):
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f"No user {email}")
+        return User.objects.filter(is_superuser=True).first() or User.objects.order_by('id').first()
+
+    def capture(self, factory, view, path, params, user):
+        request = factory.get(path, params)
+        if user is not None:
+            force_authenticate(request, user=user)
+        # explain what the view runs, not what the catalog cache would have saved it from
+        no_cache = override_settings(
+            CACHES={**settings.CACHES, 'explain': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+            CATALOG_CACHE_ALIAS='explain',
+        )
+        with no_cache, CaptureQueriesContext(connection) as context:
+            response = view(request)
+            response.render()
+        selects = [query['sql'] for query in context.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        return selects, response
+
+    def seq_scans(self, vendor, sql, plan):
+        if vendor == 'sqlite' and ' WHERE ' not in sql and ' LIMIT ' in sql:
+            # unfiltered rowid-order walk that stops at the LIMIT, not a full read
+            return []
+        return SEQ_SCAN[vendor].findall(plan)
+
+    def explain(self, sql, allow_seqscan):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                if not allow_seqscan:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute(f"EXPLAIN {sql}")
+                return '\n'.join(row[0] for row in cursor.fetchall())
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return '\n'.join(row[-1] for row in cursor.fetchall())
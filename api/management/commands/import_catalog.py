@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.imports import get_resources, import_rows, read_rows
+from service import cache
+
+
+class Command(BaseCommand):
+    help = ("Stream a CSV/JSONL file of services or products into the catalog, "
+            "upserting on the natural key (service title, product name).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or - for stdin.")
+        parser.add_argument('--resource', choices=sorted(get_resources()), default='service')
+        parser.add_argument('--format', dest='input_format', choices=('csv', 'jsonl'),
+                            help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, write nothing.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['input_format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in ('csv', 'jsonl'):
+            raise CommandError("Can't tell the input format, pass --format csv|jsonl")
+        resource = get_resources()[options['resource']]
+
+        def progress(report):
+            if options['verbosity'] > 1:
+                self.stderr.write(f"{report.read} rows read, {report.invalid} invalid")
+
+        fh = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            report = import_rows(resource, read_rows(fh, fmt), chunk_size=options['chunk_size'],
+                                 dry_run=options['dry_run'], on_chunk=progress)
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+
+        for line, errors in report.errors:
+            self.stderr.write(f"line {line}: {json.dumps(errors)}")
+        if report.created or report.updated:
+            cache.bump_version()
+        self.stdout.write(self.style.SUCCESS(
+            f"{report.read} rows in {report.seconds:.2f}s ({report.rows_per_second} rows/s): "
+            f"{report.created} created, {report.updated} updated, {report.invalid} invalid"
+            + (" (dry run)" if options['dry_run'] else "")
+        ))
@@ -0,0 +1,124 @@
+"""
+Deferred image uploads.
+
+With ``MEDIA_UPLOAD_MODE = 'deferred'`` a create/update request only writes
+the uploaded image to local staging and queues a ``media.upload`` job; the
+worker pushes it to the remote store (Cloudinary, or the offline
+``LocalFakeBackend``), asks for the ``IMAGE_VARIANTS`` sizes up front and
+writes the stored reference plus the variant URLs back to the row.
+``'inline'`` keeps CloudinaryField's upload-during-save behaviour.
+"""
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+def is_deferred():
+    return getattr(settings, 'MEDIA_UPLOAD_MODE', 'inline') == 'deferred'
+
+
+def get_variants():
+    return getattr(settings, 'IMAGE_VARIANTS', {})
+
+
+def get_backend():
+    return import_string(getattr(settings, 'MEDIA_BACKEND', 'api.media.CloudinaryBackend'))()
+
+
+def staging_storage():
+    return FileSystemStorage(location=Path(settings.MEDIA_ROOT) / 'staging')
+
+
+def stage(uploaded):
+    """Write an uploaded file to local staging and return its path."""
+    extension = os.path.splitext(uploaded.name)[1].lower()
+    storage = staging_storage()
+    name = storage.save(f"{uuid.uuid4().hex}{extension}", uploaded)
+    return storage.path(name)
+
+
+class CloudinaryBackend:
+    """Uploads with the variants as eager transformations, so they exist before the first request."""
+
+    def upload(self, path, variants):
+        from cloudinary import uploader
+
+        transformations = {name: {'width': width, 'height': height, 'crop': 'fill'}
+                           for name, (width, height) in variants.items()}
+        resource = uploader.upload_resource(path, type='upload', resource_type='image',
+                                            eager=list(transformations.values()))
+        urls = {name: resource.build_url(secure=True, **options) for name, options in transformations.items()}
+        return resource.get_prep_value(), urls
+
+
+class LocalFakeBackend:
+    """
+    Offline stand-in for Cloudinary: "uploads" into MEDIA_ROOT/fake-remote
+    and returns the same kind of stored value and variant URLs (no resizing).
+    """
+
+    def upload(self, path, variants):
+        public_id = uuid.uuid4().hex
+        extension = os.path.splitext(path)[1]
+        target = Path(settings.MEDIA_ROOT) / 'fake-remote'
+        target.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, target / f"{public_id}{extension}")
+        url = f"{settings.MEDIA_URL}fake-remote/{public_id}{extension}"
+        urls = {name: f"{url}?w={width}&h={height}" for name, (width, height) in variants.items()}
+        return f"image/upload/{public_id}{extension}", urls
+
+
+def push(model_label, pk, field, path, variants_field=None):
+    """Job body: upload a staged file and store the result on the row."""
+    model = apps.get_model(model_label)
+    variants = get_variants() if variants_field else {}
+    stored, urls = get_backend().upload(path, variants)
+
+    values = {field: stored}
+    if variants_field:
+        values[variants_field] = urls
+    if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+        values['updated_at'] = timezone.now()
+    model.objects.filter(pk=pk).update(**values)
+    os.remove(path)
+
+
+class DeferredImageUploadMixin:
+    """
+    ModelSerializer mixin: in deferred mode, image files in ``deferred_image_fields``
+    ({field: variants_field or None}) are staged and uploaded by a job after save.
+    """
+    deferred_image_fields = {}
+
+    def _pop_images(self, validated_data):
+        if not is_deferred():
+            return {}
+        return {field: validated_data.pop(field) for field in self.deferred_image_fields
+                if isinstance(validated_data.get(field), UploadedFile)}
+
+    def _queue_uploads(self, instance, images):
+        from jobs.queue import enqueue
+
+        for field, uploaded in images.items():
+            enqueue('media.upload', model_label=instance._meta.label, pk=instance.pk, field=field,
+                    path=stage(uploaded), variants_field=self.deferred_image_fields[field])
+
+    def create(self, validated_data):
+        images = self._pop_images(validated_data)
+        instance = super().create(validated_data)
+        self._queue_uploads(instance, images)
+        return instance
+
+    def update(self, instance, validated_data):
+        images = self._pop_images(validated_data)
+        instance = super().update(instance, validated_data)
+        self._queue_uploads(instance, images)
+        return instance
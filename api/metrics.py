@@ -0,0 +1,224 @@
+"""
+Per-route request metrics and query budgets.
+
+``RequestMetricsMiddleware`` times every request, counts the queries it runs
+on the default connection (via ``connection.execute_wrapper``) and their DB
+time, and aggregates them by URL name (``service-list``, ``cart-me``...).
+Serializers with ``TimedSerializerMixin`` add the time spent turning
+instances into primitives, and ``InstrumentedJSONRenderer`` the time spent
+rendering that payload to JSON. The numbers are per process and exposed in
+Prometheus text format by ``metrics_view``.
+
+``QUERY_BUDGETS = {'service-list': 3}`` caps the queries a route may run on
+reads (GET/HEAD; writes share the route name but do more work). Going over
+raises ``QueryBudgetExceeded``, failing the test client, when
+``QUERY_BUDGET_ACTION = 'raise'`` (the default under api.test_runner);
+otherwise it is logged.
+"""
+import hmac
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_current = ContextVar('request_metrics', default=None)
+# set while a timed serializer runs, so nested ones aren't counted twice
+_serializing = ContextVar('serializing', default=False)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'render_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def record(self, route, method, status, wall, stats):
+        with self.lock:
+            entry = self.routes.get((route, method))
+            if entry is None:
+                entry = self.routes[(route, method)] = {
+                    'requests': 0, 'errors': 0, 'wall': 0.0, 'db_time': 0.0, 'queries': 0,
+                    'serialize_time': 0.0, 'render_time': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS),
+                }
+            entry['requests'] += 1
+            entry['errors'] += status >= 500
+            entry['wall'] += wall
+            entry['db_time'] += stats.db_time
+            entry['queries'] += stats.queries
+            entry['serialize_time'] += stats.serialize_time
+            entry['render_time'] += stats.render_time
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if wall <= bound:
+                    entry['buckets'][index] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {key: dict(value, buckets=list(value['buckets'])) for key, value in self.routes.items()}
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+
+registry = Registry()
+
+
+def get_budget(route):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(route)
+
+
+def check_budget(route, queries):
+    budget = get_budget(route)
+    if budget is None or queries <= budget:
+        return
+    message = f"{route} ran {queries} queries, budget is {budget}"
+    if getattr(settings, 'QUERY_BUDGET_ACTION', 'log') == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        wall = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name if match else None) or 'unmatched'
+        registry.record(route, request.method, response.status_code, wall, stats)
+        if request.method in ('GET', 'HEAD'):
+            check_budget(route, stats.queries)
+        return response
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin reporting ``to_representation`` time to the current
+    request's metrics. With ``many=True`` each row is timed through the child;
+    serializer fields nested inside a timed serializer are already covered.
+    Queries run by lazy relations count here as well as in the DB time.
+    """
+
+    def to_representation(self, instance):
+        stats = _current.get()
+        if stats is None or _serializing.get():
+            return super().to_representation(instance)
+        token = _serializing.set(True)
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serialize_time += time.perf_counter() - started
+            _serializing.reset(token)
+
+
+class InstrumentedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its own time to the current request's metrics."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            stats = _current.get()
+            if stats is not None:
+                stats.render_time += time.perf_counter() - started
+
+
+def _labels(route, method):
+    return f'route="{route}",method="{method}"'
+
+
+def render_prometheus():
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    routes = sorted(registry.snapshot().items())
+    metric('http_requests_total', 'counter', 'Requests handled, by route.',
+           [f"http_requests_total{{{_labels(*key)}}} {entry['requests']}" for key, entry in routes])
+    metric('http_request_errors_total', 'counter', 'Requests answered with a 5xx status.',
+           [f"http_request_errors_total{{{_labels(*key)}}} {entry['errors']}" for key, entry in routes])
+
+    samples = []
+    for key, entry in routes:
+        for bound, count in zip(LATENCY_BUCKETS, entry['buckets']):
+            samples.append(f'http_request_duration_seconds_bucket{{{_labels(*key)},le="{bound}"}} {count}')
+        samples.append(f'http_request_duration_seconds_bucket{{{_labels(*key)},le="+Inf"}} {entry["requests"]}')
+        samples.append(f"http_request_duration_seconds_sum{{{_labels(*key)}}} {entry['wall']:.6f}")
+        samples.append(f"http_request_duration_seconds_count{{{_labels(*key)}}} {entry['requests']}")
+    metric('http_request_duration_seconds', 'histogram', 'Wall time per request.', samples)
+
+    metric('db_queries_total', 'counter', 'SQL queries run on the default connection.',
+           [f"db_queries_total{{{_labels(*key)}}} {entry['queries']}" for key, entry in routes])
+    metric('db_query_duration_seconds_total', 'counter', 'Time spent in SQL.',
+           [f"db_query_duration_seconds_total{{{_labels(*key)}}} {entry['db_time']:.6f}" for key, entry in routes])
+    metric('serializer_seconds_total', 'counter', 'Time spent serializing instances (TimedSerializerMixin).',
+           [f"serializer_seconds_total{{{_labels(*key)}}} {entry['serialize_time']:.6f}" for key, entry in routes])
+    metric('response_render_seconds_total', 'counter', 'Time spent rendering serialized payloads.',
+           [f"response_render_seconds_total{{{_labels(*key)}}} {entry['render_time']:.6f}" for key, entry in routes])
+
+    from service import cache
+    cache_stats = cache.stats()
+    metric('catalog_cache_requests_total', 'counter', 'Service catalog cache lookups.',
+           [f'catalog_cache_requests_total{{result="hit"}} {cache_stats["hits"]}',
+            f'catalog_cache_requests_total{{result="miss"}} {cache_stats["misses"]}'])
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. With METRICS_TOKEN set it expects
+    ``Authorization: Bearer <token>``; otherwise only staff sessions get in.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        # constant time, so the token can't be guessed a byte at a time
+        allowed = hmac.compare_digest(request.headers.get('Authorization', '').encode(), f"Bearer {token}".encode())
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,153 @@
+"""
+Prebuilt OpenAPI schema.
+
+``manage.py build_schema`` runs drf_yasg's generator once and writes
+``openapi.json`` (and ``openapi.yaml``) to ``settings.API_SCHEMA_DIR``,
+stamped with a fingerprint of the urlconf it was built from.
+``schema_file_view`` serves those bytes from memory with a content-hash
+ETag and ``Cache-Control``, and the swagger/redoc pages load it through
+SPEC_URL, so no request runs the generator. The fingerprint covers each
+API route's view, actions, methods and serializer field definitions
+(type, choices, required, nullability, nesting); the ``api.W001``
+check (runserver, migrate, check) and the first schema request compare it
+with the running urlconf to catch an artifact that wasn't rebuilt.
+"""
+import hashlib
+import json
+import logging
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.http import Http404, HttpResponse
+from django.urls import URLResolver, get_resolver
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_safe
+from rest_framework.fields import ChoiceField
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('json', 'yaml')
+CONTENT_TYPES = {'json': 'application/json', 'yaml': 'application/yaml'}
+FINGERPRINT_KEY = 'x-urlconf-fingerprint'
+
+
+def artifact_path(fmt):
+    return Path(settings.API_SCHEMA_DIR) / f"openapi.{fmt}"
+
+
+def _routes(patterns, prefix=''):
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            yield from _routes(entry.url_patterns, prefix + str(entry.pattern))
+        else:
+            yield prefix + str(entry.pattern), entry.callback
+
+
+def _describe_field(field):
+    # what drf_yasg turns into the field's schema: type, enum, required, readOnly, x-nullable, nesting
+    # (a related field's choices would query its table)
+    description = [type(field).__name__, field.required, field.read_only, field.allow_null,
+                   [str(choice) for choice in field.choices] if isinstance(field, ChoiceField) else None]
+    if hasattr(field, 'fields'):
+        # nested serializer
+        description.append(_describe_fields(field))
+    if getattr(field, 'child', None) is not None:
+        # many=True, ListField, DictField
+        description.append(_describe_field(field.child))
+    return description
+
+
+def _describe_fields(serializer):
+    return [[name, *_describe_field(field)] for name, field in serializer.fields.items()]
+
+
+def _describe_serializer(serializer_class):
+    return [f"{serializer_class.__module__}.{serializer_class.__qualname__}", _describe_fields(serializer_class())]
+
+
+def _actions(callback):
+    # DRF's as_view() adds 'head' to a view's actions on its first request; not part of the schema
+    return sorted((method, action) for method, action in (getattr(callback, 'actions', None) or {}).items()
+                  if method != 'head')
+
+
+def fingerprint(urlconf=None):
+    """Hash of what the schema is generated from, cheap enough to compute at startup (no drf_yasg)."""
+    entries = []
+    for route, callback in _routes(get_resolver(urlconf).url_patterns):
+        cls = getattr(callback, 'cls', None)
+        if cls is None:
+            # not a DRF view, so not in the schema
+            continue
+        serializer_class = getattr(cls, 'serializer_class', None)
+        entries.append([
+            route,
+            f"{cls.__module__}.{cls.__qualname__}",
+            _actions(callback),
+            sorted(method for method in cls.http_method_names if hasattr(cls, method)),
+            _describe_serializer(serializer_class) if serializer_class else None,
+        ])
+    return hashlib.sha256(json.dumps(entries, default=str).encode()).hexdigest()[:16]
+
+
+def built_fingerprint():
+    """The fingerprint stamped into the JSON artifact, or None if there is no artifact."""
+    try:
+        with open(artifact_path('json')) as fh:
+            return json.load(fh).get(FINGERPRINT_KEY)
+    except FileNotFoundError:
+        return None
+
+
+def build(formats, fingerprint_value=None):
+    """Generate the schema once; {format: encoded bytes}."""
+    from household_servide import schema
+
+    document = schema.generate({FINGERPRINT_KEY: fingerprint_value or fingerprint()})
+    return {fmt: schema.encode(document, fmt) for fmt in formats}
+
+
+@lru_cache(maxsize=None)
+def load(fmt):
+    """(content, ETag) for ``fmt``: the artifact, or a schema generated once per process if none was built."""
+    path = artifact_path(fmt)
+    if path.exists():
+        content = path.read_bytes()
+        built, current = built_fingerprint(), fingerprint()
+        if built != current:
+            logger.warning("OpenAPI schema %s was built for urlconf %s, running %s; run manage.py build_schema",
+                           path, built, current)
+    else:
+        logger.warning("No prebuilt OpenAPI schema at %s, generating it; run manage.py build_schema", path)
+        content = build([fmt])[fmt]
+    return content, quote_etag(hashlib.sha256(content).hexdigest()[:32])
+
+
+@require_safe
+def schema_file_view(request, fmt='json'):
+    if fmt not in FORMATS:
+        raise Http404
+    content, etag = load(fmt)
+    response = HttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.API_SCHEMA_CACHE_SECONDS)
+    # 304 (with the same ETag and Cache-Control) when If-None-Match matches
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+@register(Tags.urls)
+def check_schema_artifact(app_configs, **kwargs):
+    if not settings.API_SCHEMA_VIEWS:
+        return []
+    built = built_fingerprint()
+    if built is None:
+        return [Warning(f"No prebuilt OpenAPI schema in {settings.API_SCHEMA_DIR}.",
+                        hint="Run `manage.py build_schema`; until then the schema is generated at runtime.",
+                        id='api.W002')]
+    if built != fingerprint():
+        return [Warning("The prebuilt OpenAPI schema doesn't match the urlconf (routes, views or serializers changed).",
+                        hint="Run `manage.py build_schema` and commit the result.", id='api.W001')]
+    return []
@@ -0,0 +1,159 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from decimal import Decimal
+import json
+
+from django.db.models import F, Q
+from django.db.models.fields.tuple_lookups import Tuple, TupleGreaterThan, TupleLessThan
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on (sort_key, id) instead of using OFFSET.
+
+    The sort key is taken from the queryset ordering (so it follows
+    ``?ordering=`` from OrderingFilter) and ``id`` is always appended as a
+    tie-breaker. Every page is fetched with the row comparison
+    ``WHERE (sort_key, id) < (v, last_id)``, which PostgreSQL answers with a
+    single range scan on the (sort_key, id) index, so page 500 costs the
+    same as page 1. Backends without row values (SQLite) get Django's
+    ``sort_key < v OR (sort_key = v AND id < last_id)`` expansion instead.
+    Sort keys must be non-null and exact: the cursor carries the last
+    row's value and the seek compares against it for equality at ties, so
+    a real/float4 expression (e.g. ``SearchRank``) has to be cast to
+    ``FloatField`` (double precision) before it is ordered on.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    default_ordering = '-id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_sort_key(queryset)
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['r'])
+
+        # walking backwards flips both the comparison and the ORDER BY
+        descending = self.descending != self.reverse
+        queryset = queryset.order_by(*self.get_order_by(descending))
+        if cursor is not None:
+            queryset = queryset.filter(self.get_seek_filter(cursor, descending))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_sort_key(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or [self.default_ordering]
+        term = ordering[0]
+        if not isinstance(term, str):
+            term = self.default_ordering
+        descending = term.startswith('-')
+        field = term.lstrip('-')
+        if field in ('pk', 'id'):
+            field = None
+        return field, descending
+
+    def get_order_by(self, descending):
+        pk = '-pk' if descending else 'pk'
+        if self.field is None:
+            return [pk]
+        key = F(self.field).desc() if descending else F(self.field).asc()
+        return [key, pk]
+
+    def get_seek_filter(self, cursor, descending):
+        # key and id are always ordered the same way, so one row comparison covers both;
+        # cursor['v'] must equal the stored key exactly (see the class docstring)
+        if self.field is None:
+            return Q(**{'pk__lt' if descending else 'pk__gt': cursor['id']})
+        lookup = TupleLessThan if descending else TupleGreaterThan
+        return lookup(Tuple(F(self.field), F('pk')), (cursor['v'], cursor['id']))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            cursor['id'] = int(cursor['id'])
+            cursor.setdefault('v', None)
+            cursor['r'] = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+        if self.field is not None and cursor['v'] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, instance, reverse):
+        cursor = {'id': instance.pk}
+        if self.field is not None:
+            cursor['v'] = self._encode_value(getattr(instance, self.field))
+        if reverse:
+            cursor['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,115 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+from django.db.models.signals import post_save
+from rest_framework.filters import BaseFilterBackend
+
+# model -> ((field, weight), ...) for every model with a maintained search_vector
+_registry = {}
+
+WEIGHTS = ('A', 'B', 'C', 'D')
+FALLBACK_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+
+def search_config():
+    return getattr(settings, 'SEARCH_CONFIG', 'english')
+
+
+def is_postgres(conn=connection):
+    return conn.vendor == 'postgresql'
+
+
+def register(model, fields):
+    """
+    Keep ``model.search_vector`` in sync with ``fields`` (most important first).
+    Call from the owning app's ``AppConfig.ready``.
+    """
+    _registry[model] = tuple(zip(fields, WEIGHTS))
+    post_save.connect(_refresh_on_save, sender=model, dispatch_uid=f'search-vector-{model._meta.label}')
+
+
+def get_fields(model):
+    return _registry.get(model, ())
+
+
+def build_vector(model):
+    vector = None
+    for field, weight in get_fields(model):
+        part = SearchVector(field, weight=weight, config=search_config())
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def refresh_search_vector(model, pks=None):
+    """Recompute search_vector for ``pks`` (or the whole table). No-op off PostgreSQL."""
+    if not is_postgres() or not get_fields(model):
+        return 0
+    qs = model.objects.all() if pks is None else model.objects.filter(pk__in=pks)
+    return qs.update(search_vector=build_vector(model))
+
+
+def _refresh_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & {f for f, _ in get_fields(sender)}:
+        return
+    refresh_search_vector(sender, [instance.pk])
+
+
+def tokenize(term):
+    return re.findall(r'\w+', term or '')[:8]
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    ?q=clean hou  -> ranked, prefix-matching search over the model's search_vector.
+
+    PostgreSQL uses the GIN-indexed tsvector column; other backends (the
+    SQLite dev setup) fall back to a weighted icontains match so results and
+    ordering stay comparable. ``?search=`` is still accepted for old clients.
+    """
+    search_param = 'q'
+    legacy_search_param = 'search'
+    rank_field = 'search_rank'
+
+    def get_search_term(self, request):
+        return request.query_params.get(self.search_param) or request.query_params.get(self.legacy_search_param, '')
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = tokenize(self.get_search_term(request))
+        if not tokens or not get_fields(queryset.model):
+            return queryset
+        if is_postgres():
+            queryset = self.filter_postgres(queryset, tokens)
+        else:
+            queryset = self.filter_fallback(queryset, tokens)
+        return queryset.order_by(f'-{self.rank_field}', '-pk')
+
+    def filter_postgres(self, queryset, tokens):
+        # prefix match every token: "clean hou" -> clean:* & hou:*
+        raw = ' & '.join(f'{token}:*' for token in tokens)
+        query = SearchQuery(raw, search_type='raw', config=search_config())
+        return (queryset
+                .filter(search_vector=query)
+                # ts_rank is real (float4) and comes back rounded; the keyset cursor needs the
+                # exact value to seek past ties, so page on it as double precision
+                .annotate(**{self.rank_field: Cast(SearchRank(F('search_vector'), query), FloatField())}))
+
+    def filter_fallback(self, queryset, tokens):
+        fields = get_fields(queryset.model)
+        rank = Value(0.0, output_field=FloatField())
+        for token in tokens:
+            match = Q()
+            for field, weight in fields:
+                match |= Q(**{f'{field}__icontains': token})
+                rank = rank + Case(
+                    When(**{f'{field}__icontains': token}, then=Value(FALLBACK_WEIGHTS[weight])),
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                )
+            queryset = queryset.filter(match)
+        return queryset.annotate(**{self.rank_field: rank})
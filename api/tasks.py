@@ -0,0 +1,8 @@
+from jobs.queue import task
+
+from . import media
+
+
+@task('media.upload', max_attempts=5)
+def upload_image(model_label, pk, field, path, variants_field=None):
+    media.push(model_label, pk, field, path, variants_field)
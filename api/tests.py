@@ -1,3 +1,308 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import imports, metrics, openapi, throttling
+from api.authentication import StatelessJWTAuthentication, invalidate_user, user_cache
+from jobs import queue
+from jobs.models import Job
+from service.checkout import CheckoutService
+from service.models import Cart, CartItem, Review, Service
+from shop.models import Product
+from shop.serializers import ProductSerializer
+from users.models import ContactMessage
+from users.serializers import TokenObtainPairSerializer
+
+User = get_user_model()
+
+SHARED_AUTH_CACHE = {'TTL': 60, 'MAX_SIZE': 1024, 'SHARED_CACHE': 'default'}
+LOCAL_AUTH_CACHE = dict(SHARED_AUTH_CACHE, SHARED_CACHE=None)
+
+
+def access_token(user):
+    return str(TokenObtainPairSerializer.get_token(user).access_token)
+
+
+def authenticate(token):
+    request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"JWT {token}"))
+    return StatelessJWTAuthentication().authenticate(request)[0]
+
+
+@override_settings(AUTH_USER_CACHE=SHARED_AUTH_CACHE)
+class StatelessAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(email='staff@example.com', password='x', is_staff=True)
+
+    def test_user_comes_from_claims(self):
+        token = access_token(self.user)
+        with self.assertNumQueries(0):
+            user = authenticate(token)
+        self.assertEqual((user.pk, user.is_staff), (self.user.pk, True))
+
+    def test_demotion_revokes_issued_tokens(self):
+        token = access_token(self.user)
+        self.user.is_staff = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            authenticate(token)
+
+    def test_profile_edit_keeps_tokens(self):
+        token = access_token(self.user)
+        self.user.first_name = 'Renamed'
+        self.user.save()
+        self.assertEqual(authenticate(token).pk, self.user.pk)
+
+    def test_evicted_version_keeps_tokens_revoked(self):
+        token = access_token(self.user)
+        invalidate_user(self.user.pk, revoke=True)
+        caches['default'].clear()
+        with self.assertRaises(AuthenticationFailed):
+            authenticate(token)
+        self.assertEqual(authenticate(access_token(self.user)).pk, self.user.pk)
+
+    @override_settings(AUTH_USER_CACHE=LOCAL_AUTH_CACHE)
+    def test_without_shared_cache_the_database_decides(self):
+        token = access_token(self.user)
+        # bypasses the signals, like a change made by another process would from here
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        with self.assertNumQueries(1):
+            user = authenticate(token)
+        self.assertFalse(user.is_staff)
+
+
+@override_settings(
+    AUTH_USER_CACHE=SHARED_AUTH_CACHE,
+    REST_FRAMEWORK=dict(settings.REST_FRAMEWORK,
+                        DEFAULT_AUTHENTICATION_CLASSES=('api.authentication.StatelessJWTAuthentication',)),
+)
+class AsyncPaymentInitiationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='x', phone_number='01700000000')
+
+    async def test_deferred_user_fields_load_off_the_event_loop(self):
+        gateway = mock.Mock()
+        gateway.acreate_session = mock.AsyncMock(return_value={'status': 'SUCCESS', 'GatewayPageURL': 'https://pay'})
+        with mock.patch('service.payments.get_gateway', return_value=gateway):
+            response = await self.async_client.post(
+                '/api/v1/payment/initiate/async/', {'order_id': 1}, content_type='application/json',
+                headers={'Authorization': f"JWT {access_token(self.user)}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(gateway.acreate_session.call_args.args[0]['cus_phone'], '01700000000')
+
+
+class SchemaFingerprintTests(TestCase):
+    def test_serving_requests_does_not_change_the_fingerprint(self):
+        before = openapi.fingerprint()
+        # the first request through a viewset adds 'head' to its actions
+        self.client.get('/api/v1/services/', HTTP_HOST='127.0.0.1')
+        self.assertEqual(openapi.fingerprint(), before)
+
+    def test_artifact_matches_the_urlconf(self):
+        self.assertEqual(openapi.built_fingerprint(), openapi.fingerprint())
+
+    def test_artifact_matches_the_generated_schema(self):
+        # catches what the fingerprint can't see, e.g. a serializer picked in get_serializer_class()
+        for fmt, content in openapi.build(openapi.FORMATS).items():
+            with self.subTest(fmt=fmt):
+                self.assertEqual(openapi.artifact_path(fmt).read_bytes(), content)
+
+
+class QueryBudgetTests(TestCase):
+    """Under api.test_runner every GET below fails if it goes over its QUERY_BUDGETS entry."""
+
+    def setUp(self):
+        caches['default'].clear()
+        user_cache.clear()
+        self.user = User.objects.create_user(email='budget@example.com', password='x')
+        self.auth = {'HTTP_AUTHORIZATION': f"JWT {access_token(self.user)}", 'HTTP_HOST': '127.0.0.1'}
+        self.services = [Service.objects.create(title=f'Service {n}', price=Decimal('20.00')) for n in range(3)]
+        for service in self.services:
+            Review.objects.create(service=service, user=self.user, rating=4)
+        Product.objects.create(name='Mop', description='', price=Decimal('5.00'))
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.bulk_create([CartItem(cart=cart, service=service) for service in self.services])
+        self.order = CheckoutService(self.user).checkout()
+        self.item = CartItem.objects.create(cart=cart, service=self.services[0])
+
+    def test_test_runner_raises(self):
+        self.assertEqual(settings.QUERY_BUDGET_ACTION, 'raise')
+
+    def test_read_routes_stay_within_budget(self):
+        service = self.services[0]
+        for url in ('/api/v1/services/', f'/api/v1/services/{service.pk}/',
+                    f'/api/v1/services/{service.pk}/overview/', f'/api/v1/reviews/?service={service.pk}',
+                    '/api/v1/products/', '/api/v1/orders/', f'/api/v1/orders/{self.order.pk}/',
+                    '/api/v1/cart/', '/api/v1/cart/items/', f'/api/v1/cart/items/{self.item.pk}/'):
+            # first request of each: cold user and catalog caches
+            user_cache.clear()
+            caches['default'].clear()
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, **self.auth).status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={'order-list': 1})
+    def test_over_budget_raises(self):
+        with self.assertRaises(metrics.QueryBudgetExceeded):
+            self.client.get('/api/v1/orders/', **self.auth)
+
+    @override_settings(QUERY_BUDGETS={'order-list': 1}, QUERY_BUDGET_ACTION='log')
+    def test_over_budget_is_logged_outside_tests(self):
+        with self.assertLogs('api.metrics', 'WARNING'):
+            self.assertEqual(self.client.get('/api/v1/orders/', **self.auth).status_code, 200)
+
+
+@override_settings(THROTTLE_RATES={'contactmessage.create': '1/h burst 2'})
+class ContactMessageTests(TestCase):
+    def setUp(self):
+        throttling.get_store().clear()
+        self.message = {'name': 'Rina', 'email': 'rina@example.com', 'subject': 'Hello', 'message': 'Hi there'}
+
+    def send(self):
+        return self.client.post('/api/v1/contact-messages/', self.message, HTTP_HOST='127.0.0.1')
+
+    def test_anyone_can_send_only_staff_can_read(self):
+        self.assertEqual(self.send().status_code, 201)
+        self.assertEqual(Job.objects.get().name, 'contact.notify')
+        customer = User.objects.create_user(email='customer@example.com', password='x')
+        staff = User.objects.create_user(email='staff@example.com', password='x', is_staff=True)
+        for user, expected in ((None, 401), (customer, 403), (staff, 200)):
+            headers = {'HTTP_AUTHORIZATION': f"JWT {access_token(user)}"} if user else {}
+            with self.subTest(user=user):
+                response = self.client.get('/api/v1/contact-messages/', HTTP_HOST='127.0.0.1', **headers)
+                self.assertEqual(response.status_code, expected)
+
+    def test_sending_is_rate_limited_per_client(self):
+        self.assertEqual([self.send().status_code for _ in range(3)], [201, 201, 429])
+        self.assertGreater(int(self.send()['Retry-After']), 0)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+
+@override_settings(METRICS_TOKEN='scrape-token')
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+
+    def test_token_is_required(self):
+        for header in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}, {'HTTP_AUTHORIZATION': 'Bearer scrape-token '}):
+            self.assertEqual(self.client.get('/metrics/', HTTP_HOST='127.0.0.1', **header).status_code, 403)
+
+    def test_serializer_time_is_reported(self):
+        Service.objects.create(title='Cleaning', price=Decimal('20.00'))
+        self.client.get('/api/v1/services/', HTTP_HOST='127.0.0.1')
+        self.assertGreater(metrics.registry.snapshot()[('service-list', 'GET')]['serialize_time'], 0)
+        response = self.client.get('/metrics/', HTTP_HOST='127.0.0.1', HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'serializer_seconds_total{route="service-list",method="GET"}', response.content)
+
+
+@override_settings(MEDIA_UPLOAD_MODE='deferred', MEDIA_BACKEND='api.media.LocalFakeBackend',
+                   IMAGE_VARIANTS={'thumb': (64, 64), 'card': (320, 240)})
+class DeferredImageUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_upload_is_staged_then_pushed_by_a_job(self):
+        image = SimpleUploadedFile('mop.png', b'not really a png', content_type='image/png')
+        serializer = ProductSerializer(data={'name': 'Mop', 'description': 'Flat mop', 'price': '5.00',
+                                              'product_image': image})
+        serializer.is_valid(raise_exception=True)
+        product = serializer.save()
+        product.refresh_from_db()
+        # nothing remote yet: the request only staged the file and queued the push
+        self.assertFalse(product.product_image)
+        job, = queue.claim('test-worker')
+        staged = job.payload['path']
+        self.assertTrue(os.path.exists(staged))
+
+        self.assertTrue(queue.run(job))
+        product.refresh_from_db()
+        remote = os.path.join(settings.MEDIA_ROOT, 'fake-remote', f"{product.product_image.public_id}.png")
+        self.assertTrue(os.path.exists(remote))
+        self.assertEqual(set(product.image_variants), {'thumb', 'card'})
+        self.assertTrue(product.image_variants['thumb'].endswith('?w=64&h=64'))
+        self.assertFalse(os.path.exists(staged))
+
+
+class CatalogImportTests(TestCase):
+    def run_import(self, text, fmt):
+        return imports.import_rows(imports.get_resources()['service'], imports.read_rows(io.StringIO(text), fmt))
+
+    def test_blank_cells_keep_stored_values(self):
+        Service.objects.create(title='Cleaning', description='Deep clean', price=Decimal('10.00'), duration_minutes=60)
+        Service.objects.create(title='Painting', description='Walls', price=Decimal('50.00'), duration_minutes=240)
+        report = self.run_import("title,description,price,duration_minutes\n"
+                                 "Cleaning,,12.00,\n"
+                                 "Painting,Walls and ceilings,55.00,\n"
+                                 "Plumbing,Pipes,30.00,45\n", 'csv')
+        self.assertEqual((report.created, report.updated, report.invalid), (1, 2, 0))
+        self.assertEqual(list(Service.objects.order_by('title').values_list('title', 'description', 'price',
+                                                                            'duration_minutes')),
+                         [('Cleaning', 'Deep clean', Decimal('12.00'), 60),
+                          ('Painting', 'Walls and ceilings', Decimal('55.00'), 240),
+                          ('Plumbing', 'Pipes', Decimal('30.00'), 45)])
+
+    def test_malformed_jsonl_line_is_reported(self):
+        report = self.run_import('{"title": "Cleaning", "price": "10.00"}\n'
+                                 '{"title": "Broken", "price": \n'
+                                 '{"title": "Painting", "price": "x"}\n'
+                                 '{"title": "Plumbing", "price": "30.00"}\n', 'jsonl')
+        self.assertEqual((report.read, report.created, report.invalid), (4, 2, 2))
+        self.assertEqual([line for line, _errors in report.errors], [2, 3])
+        self.assertIn('Invalid JSON', report.errors[0][1]['non_field_errors'][0])
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # plenty of ties on the sort key, so the id tie-breaker matters
+        Service.objects.bulk_create([Service(title=f'Service {n}', price=Decimal(10 + n % 4), average_rating=n % 3)
+                                     for n in range(45)])
+
+    def walk(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url, HTTP_HOST='127.0.0.1')
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return seen
+
+    def test_pages_cover_every_row_once_in_order(self):
+        for ordering, tie_breaker in (('-average_rating', '-id'), ('price', 'id')):
+            with self.subTest(ordering=ordering):
+                caches['default'].clear()
+                expected = list(Service.objects.order_by(ordering, tie_breaker).values_list('id', flat=True))
+                self.assertEqual(self.walk(f'/api/v1/services/?ordering={ordering}&page_size=7'), expected)
+
+    def test_previous_link_returns_the_previous_page(self):
+        first = self.client.get('/api/v1/services/?ordering=-average_rating&page_size=7', HTTP_HOST='127.0.0.1')
+        second = self.client.get(first.data['next'], HTTP_HOST='127.0.0.1')
+        back = self.client.get(second.data['previous'], HTTP_HOST='127.0.0.1')
+        self.assertEqual([row['id'] for row in back.data['results']], [row['id'] for row in first.data['results']])
+
+    @skipUnlessDBFeature('supports_tuple_lookups')
+    def test_seek_is_a_row_comparison(self):
+        first = self.client.get('/api/v1/services/?ordering=-average_rating&page_size=7', HTTP_HOST='127.0.0.1')
+        caches['default'].clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'], HTTP_HOST='127.0.0.1')
+        table = connection.ops.quote_name(Service._meta.db_table)
+        self.assertTrue(any(f'({table}."average_rating", {table}."id") <' in query['sql']
+                            for query in queries.captured_queries))
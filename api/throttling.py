@@ -0,0 +1,199 @@
+"""
+Token-bucket rate limiting for write and auth endpoints.
+
+Each (rate key, client) pair gets a bucket holding up to ``burst`` tokens
+(the rate's N by default) that refills continuously at N per period; a
+request takes one token or is refused with a ``Retry-After`` of the time
+until the next token. Rates live in ``settings.THROTTLE_RATES`` keyed by
+``"<scope>.<action>"`` or ``"<scope>"``, where the scope is the view's
+``throttle_scope``, else its router basename, else its URL name, so
+third-party views (djoser, simplejwt) are configured without subclassing.
+Views with no matching rate aren't throttled. Signed-in clients are
+bucketed per user, anonymous ones per IP (``NUM_PROXIES`` aware).
+
+Buckets live in ``settings.THROTTLE_STORE['BACKEND']``: ``MemoryBucketStore``
+(per process) or ``RedisBucketStore`` (one Lua script per decision, so it
+is atomic across workers and nodes). Neither touches the database.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'(\d+)/(\d*)([smhd])[a-z]*(?:\s+burst\s+(\d+))?')
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``"10/min"``, ``"5/15m"`` or ``"10/min burst 30"`` -> (tokens per second, capacity)."""
+    match = RATE_RE.fullmatch(rate.strip().lower())
+    if match is None:
+        raise ValueError(f"Invalid throttle rate {rate!r}")
+    count, multiplier, unit, burst = match.groups()
+    period = int(multiplier or 1) * PERIODS[unit]
+    return int(count) / period, int(burst or count)
+
+
+class MemoryBucketStore:
+    """Buckets in a dict; right for a single process (runserver, one worker)."""
+
+    def __init__(self, max_keys=10000, **options):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+        self.max_keys = max_keys
+
+    def take(self, key, rate, capacity, cost=1):
+        """Take ``cost`` tokens. Returns 0 if allowed, else seconds until they'd be there."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, stamp = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self.buckets[key] = (tokens, now)
+            self.buckets.move_to_end(key)
+            # dropping the least recently used bucket only ever refills it early
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+# KEYS[1] bucket; ARGV rate (tokens/s), capacity, cost. Server time, so node clocks don't matter.
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or capacity
+local stamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local wait = 0
+if tokens >= cost then
+  tokens = tokens - cost
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisBucketStore:
+    """
+    Buckets in Redis (or anything speaking its protocol with EVALSHA and TIME),
+    shared by every worker and node. Needs the ``redis`` package.
+    """
+
+    def __init__(self, location='', prefix='throttle:', **options):
+        import redis
+
+        self.client = redis.Redis.from_url(location or settings.REDIS_URL)
+        self.prefix = prefix
+        # register_script sends EVALSHA and falls back to EVAL once per server restart
+        self.script = self.client.register_script(TAKE_SCRIPT)
+
+    def take(self, key, rate, capacity, cost=1):
+        return float(self.script(keys=[self.prefix + key], args=[rate, capacity, cost]))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = {'BACKEND': 'api.throttling.MemoryBucketStore',
+                          **getattr(settings, 'THROTTLE_STORE', {})}
+                options = {key.lower(): value for key, value in config.items() if key != 'BACKEND'}
+                _store = import_string(config['BACKEND'])(**options)
+    return _store
+
+
+@receiver(setting_changed)
+def _reset(setting, **kwargs):
+    global _store
+    if setting == 'THROTTLE_STORE':
+        _store = None
+
+
+def get_rate(scope, action=None):
+    """The (rate key, rate) that applies, ``"<scope>.<action>"`` first; (None, None) if neither is set."""
+    rates = getattr(settings, 'THROTTLE_RATES', {})
+    for key in ((f"{scope}.{action}", scope) if action else (scope,)):
+        if key in rates:
+            return key, rates[key]
+    return None, None
+
+
+def get_scope(request, view):
+    scope = getattr(view, 'throttle_scope', None) or getattr(view, 'basename', None)
+    if scope:
+        return scope
+    match = getattr(request, 'resolver_match', None)
+    return match.url_name if match else None
+
+
+def get_ident(request, user=None):
+    """``user:<pk>`` for a signed-in user, ``ip:<address>`` otherwise."""
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{BaseThrottle().get_ident(request)}"
+
+
+def check(scope, request, user=None, action=None):
+    """Take a token for ``scope``; returns 0 when allowed, else the seconds to wait."""
+    key, rate = get_rate(scope, action)
+    if rate is None:
+        return 0
+    tokens_per_second, capacity = parse_rate(rate)
+    try:
+        # actions falling back to the scope-wide rate share its bucket
+        return get_store().take(f"{key}:{get_ident(request, user)}", tokens_per_second, capacity)
+    except Exception:
+        # an unreachable store shouldn't take the endpoints down with it
+        logger.exception("Throttle store failed, allowing %s", scope)
+        return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle over ``check``; in DEFAULT_THROTTLE_CLASSES, so it covers every API view."""
+
+    def allow_request(self, request, view):
+        scope = get_scope(request, view)
+        if scope is None:
+            return True
+        self.delay = check(scope, request, request.user, getattr(view, 'action', None))
+        return not self.delay
+
+    def wait(self):
+        # DRF formats Retry-After with %d; round up so a sub-second wait isn't "0"
+        return math.ceil(self.delay)
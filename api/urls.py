@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 
 from service.views import (
     ServiceViewSet, ReviewViewSet, CartItemViewSet,
-    CartMeView, CartDetailView,OrderViewSet,initiate_payment,payment_success,payment_fail,payment_cancel
+    CartMeView, CartDetailView,OrderViewSet,SalesAnalyticsView,initiate_payment,initiate_payment_async,payment_success,payment_fail,payment_cancel
 )
 from users.views import TeamViewSet, ContactMessageViewSet
 from shop.views import ProductViewSet
@@ -31,10 +31,15 @@ urlpatterns = [
     # If Cart.pk is an AutoField/BigAutoField, use <int:pk>; only use <uuid:pk> if pk is a UUIDField.
     path("cart/<int:pk>/", CartDetailView.as_view(), name="cart-detail"),
 
+    # Staff sales dashboard, served from the daily rollup tables
+    path("analytics/sales/", SalesAnalyticsView.as_view(), name="analytics-sales"),
+
     # Auth (Djoser)
     path("auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.jwt")),
     path("payment/initiate/", initiate_payment, name="initiate-payment"),
+    # same as above, awaited on the gateway when served through asgi.py
+    path("payment/initiate/async/", initiate_payment_async, name="initiate-payment-async"),
     path("payment/success/", payment_success, name="payment-success"),
     path("payment/fail/", payment_fail, name="payment-fail"),
     path("payment/cancel/", payment_cancel, name="payment-cancel"),
@@ -0,0 +1,58 @@
+"""
+Cold starts: a fresh interpreter imports the WSGI entry point Vercel loads
+(household_servide.wsgi) and serves one request through it. Each run is a
+new process, so nothing is warm but the OS file cache.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+DEFAULT_PATH = '/api/v1/services/'
+
+# argv: request path. Prints timings as JSON on the last stdout line.
+SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from household_servide.wsgi import app
+loaded = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'HTTP_HOST': '127.0.0.1'}
+setup_testing_defaults(environ)
+statuses = []
+body = b''.join(app(environ, lambda status, headers, exc_info=None: statuses.append(status)))
+done = time.perf_counter()
+print(json.dumps({'import_ms': (loaded - started) * 1000, 'first_response_ms': (done - loaded) * 1000,
+                  'status': int(statuses[0].split()[0]), 'bytes': len(body)}))
+"""
+
+
+def run_once(module, path=DEFAULT_PATH, python_args=()):
+    """One cold start under settings ``module``. Returns (timings, stderr)."""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': module}
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, *python_args, '-c', SNIPPET, path], env=env, cwd=settings.BASE_DIR,
+                            capture_output=True, text=True)
+    wall = (time.perf_counter() - started) * 1000
+    if result.returncode:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(f"{module}: {lines[-1] if lines else 'cold start failed'}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    # interpreter startup and teardown included
+    timings['process_ms'] = wall
+    return timings, result.stderr
+
+
+def measure(module, path=DEFAULT_PATH, runs=5):
+    """Median and max of each timing over ``runs`` cold starts."""
+    samples = [run_once(module, path)[0] for _ in range(runs)]
+    statuses = {sample['status'] for sample in samples}
+    report = {'runs': runs, 'path': path, 'status': statuses.pop() if len(statuses) == 1 else sorted(statuses)}
+    for key in ('import_ms', 'first_response_ms', 'process_ms'):
+        values = [sample[key] for sample in samples]
+        report[key] = {'median': round(statistics.median(values), 1), 'max': round(max(values), 1)}
+    return report
@@ -0,0 +1,83 @@
+import json
+import platform
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from benchmarks import seed as seeding
+from benchmarks.runner import run_scenario
+from benchmarks.scenarios import SCENARIOS
+from service import cache
+
+DEFAULT_SCENARIOS = 'browse,search,cart_add,checkout,review_post'
+
+
+class Command(BaseCommand):
+    help = ("Seed benchmark data and drive concurrent in-process clients through the hot endpoints; "
+            "prints p50/p95/p99 latency, throughput and queries per operation as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help="Bulk-create benchmark data before running.")
+        parser.add_argument('--flush', action='store_true', help="Delete benchmark data and exit.")
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--services', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=5000)
+        parser.add_argument('--carts', type=int, default=50)
+        parser.add_argument('--orders', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--scenarios', default=DEFAULT_SCENARIOS,
+                            help=f"Comma separated, from: {', '.join(sorted(SCENARIOS))}")
+        parser.add_argument('--requests', type=int, default=200, help="Operations per scenario.")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--random-seed', type=int, default=42)
+        parser.add_argument('--output', help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            self.stdout.write(json.dumps(seeding.flush()))
+            return
+
+        names = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(unknown)}")
+
+        report = {'meta': {
+            'started_at': timezone.now().isoformat(),
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'debug': settings.DEBUG,
+            'concurrency': options['concurrency'],
+            'requests': options['requests'],
+        }}
+
+        if options['seed']:
+            started = time.perf_counter()
+            counts = seeding.seed(
+                users=options['users'], services=options['services'], reviews=options['reviews'],
+                carts=options['carts'], orders=options['orders'], batch_size=options['batch_size'],
+            )
+            cache.bump_version()
+            report['seed'] = dict(counts, seconds=round(time.perf_counter() - started, 2))
+
+        report['scenarios'] = {}
+        for index, name in enumerate(names):
+            try:
+                report['scenarios'][name] = run_scenario(
+                    name, requests=options['requests'], concurrency=options['concurrency'],
+                    seed=options['random_seed'] + index * 1000,
+                )
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        self.stdout.write(output)
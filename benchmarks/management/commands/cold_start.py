@@ -0,0 +1,37 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import coldstart
+from household_servide import SETTINGS_MODULES
+
+
+class Command(BaseCommand):
+    help = ("Time cold starts of the WSGI entry point: importing household_servide.wsgi, then the first "
+            "response, each run in a fresh interpreter. Compares settings modules side by side.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modules', default=os.environ.get('DJANGO_SETTINGS_MODULE') or SETTINGS_MODULES['development'],
+                            help=f"Comma separated settings modules, e.g. {','.join(SETTINGS_MODULES.values())}")
+        parser.add_argument('--path', default=coldstart.DEFAULT_PATH)
+        parser.add_argument('--runs', type=int, default=7)
+        parser.add_argument('--output', help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        report = {}
+        for module in [name.strip() for name in options['modules'].split(',') if name.strip()]:
+            try:
+                report[module] = coldstart.measure(module, options['path'], options['runs'])
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            result = report[module]
+            self.stderr.write(f"{module}: import {result['import_ms']['median']} ms, "
+                              f"first response {result['first_response_ms']['median']} ms "
+                              f"(HTTP {result['status']}), process {result['process_ms']['median']} ms")
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        self.stdout.write(output)
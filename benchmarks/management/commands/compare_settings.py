@@ -0,0 +1,85 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from household_servide import SETTINGS_MODULES
+
+DEFAULT_MODULES = ','.join(SETTINGS_MODULES.values())
+
+# django.setup() plus a first request, timed inside a fresh interpreter
+STARTUP_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+from django.test import Client
+Client(HTTP_HOST='127.0.0.1').get('/api/v1/services/')
+print(json.dumps({'setup_ms': (setup - started) * 1000, 'first_request_ms': (time.perf_counter() - setup) * 1000}))
+"""
+
+
+class Command(BaseCommand):
+    help = ("Compare settings modules (default: development vs production): interpreter startup "
+            "to first response, then the benchmark scenarios, each module in its own process.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modules', default=DEFAULT_MODULES, help="Comma separated settings modules.")
+        parser.add_argument('--startup-runs', type=int, default=5)
+        parser.add_argument('--scenarios', default='browse,search,deep_page')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--output', help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        modules = [name.strip() for name in options['modules'].split(',') if name.strip()]
+        report = {}
+        for module in modules:
+            self.stderr.write(f"{module}...")
+            report[module] = {
+                'startup': self.startup(module, options['startup_runs']),
+                'scenarios': self.scenarios(module, options),
+            }
+
+        for module, result in report.items():
+            self.stderr.write(f"{module}: setup {result['startup']['setup_ms']} ms, "
+                              f"first request {result['startup']['first_request_ms']} ms")
+            for name, stats in result['scenarios'].items():
+                self.stderr.write(f"    {name}: {stats['throughput_ops']} ops/s, p50 {stats['latency_ms']['p50']} ms, "
+                                  f"{stats['queries']['mean']} queries/op")
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        self.stdout.write(output)
+
+    def env(self, module):
+        return {**os.environ, 'DJANGO_SETTINGS_MODULE': module}
+
+    def run(self, args, module):
+        result = subprocess.run([sys.executable, *args], env=self.env(module), cwd=settings.BASE_DIR,
+                                capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f"{module}: {result.stderr.strip().splitlines()[-1] if result.stderr else 'failed'}")
+        return result.stdout
+
+    def startup(self, module, runs):
+        samples = [json.loads(self.run(['-c', STARTUP_SNIPPET], module).strip().splitlines()[-1])
+                   for _ in range(runs)]
+        return {key: round(statistics.median(sample[key] for sample in samples), 1)
+                for key in ('setup_ms', 'first_request_ms')}
+
+    def scenarios(self, module, options):
+        with tempfile.NamedTemporaryFile(suffix='.json') as fh:
+            self.run([str(settings.BASE_DIR / 'manage.py'), 'benchmark', '--scenarios', options['scenarios'],
+                      '--requests', str(options['requests']), '--concurrency', str(options['concurrency']),
+                      '--output', fh.name], module)
+            with open(fh.name) as result:
+                return json.load(result)['scenarios']
@@ -0,0 +1,53 @@
+import os
+import re
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import coldstart
+
+# "import time: self [us] | cumulative | imported package" (nesting indented)
+LINE_RE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| +(\S+)')
+
+
+def parse(stderr):
+    """(name, self us, cumulative us) per module, in import order."""
+    return [(match[3], int(match[1]), int(match[2])) for match in map(LINE_RE.match, stderr.splitlines()) if match]
+
+
+class Command(BaseCommand):
+    help = ("Cold start the WSGI entry point under `python -X importtime` and report the slowest "
+            "imports, plus self time summed per top-level package.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settings-module', default=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                            help="Settings to start with (default: the current ones).")
+        parser.add_argument('--path', default=coldstart.DEFAULT_PATH, help="Request served after startup.")
+        parser.add_argument('--limit', type=int, default=25)
+        parser.add_argument('--sort', choices=('self', 'cumulative'), default='cumulative',
+                            help="cumulative lists each module with what it pulled in.")
+
+    def handle(self, *args, **options):
+        try:
+            timings, stderr = coldstart.run_once(options['settings_module'], options['path'], ('-X', 'importtime'))
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        modules = parse(stderr)
+        total = sum(own for _name, own, _cumulative in modules)
+
+        packages = defaultdict(int)
+        for name, own, _cumulative in modules:
+            packages[name.split('.')[0]] += own
+
+        self.stdout.write(f"{len(modules)} modules, {total / 1000:.1f} ms importing; "
+                          f"WSGI import {timings['import_ms']:.1f} ms, "
+                          f"first response {timings['first_response_ms']:.1f} ms (HTTP {timings['status']})\n")
+        self.stdout.write("By package (self time):")
+        for package, own in sorted(packages.items(), key=lambda item: -item[1])[:options['limit']]:
+            self.stdout.write(f"  {own / 1000:8.1f} ms  {package}")
+
+        key = 1 if options['sort'] == 'self' else 2
+        self.stdout.write(f"\nSlowest imports ({options['sort']}):")
+        self.stdout.write(f"  {'self ms':>8}  {'cum ms':>8}  module")
+        for name, own, cumulative in sorted(modules, key=lambda row: -row[key])[:options['limit']]:
+            self.stdout.write(f"  {own / 1000:8.1f}  {cumulative / 1000:8.1f}  {name}")
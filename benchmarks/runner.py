@@ -0,0 +1,147 @@
+"""
+In-process load driver: ``concurrency`` threads, each with its own test
+client authenticated as a different seeded user (real JWT header, so auth
+cost is included), run a scenario until ``requests`` operations are done.
+"""
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection
+from rest_framework.test import APIClient
+
+from service.models import Service
+from users.models import User
+from users.serializers import TokenObtainPairSerializer
+
+from .scenarios import SCENARIOS
+from .seed import EMAIL_PREFIX, TITLE_PREFIX
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Session:
+    def __init__(self, user, service_ids, seed):
+        self.user = user
+        self.service_ids = service_ids
+        self.rng = random.Random(seed)
+        self.state = {}
+        self.samples = []  # (seconds, queries, ok)
+        self.groups = defaultdict(list)  # label -> indexes into samples
+        # ALLOWED_HOSTS doesn't include the test client's default "testserver"
+        self.client = APIClient(HTTP_HOST='127.0.0.1')
+        # issued like /auth/jwt/create/, so it carries the stateless-auth claims
+        self.token = str(TokenObtainPairSerializer.get_token(user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f"JWT {self.token}")
+
+    def timed_call(self, func, group=None):
+        """Time ``func``; ``group`` also reports the sample under that label (e.g. a page depth)."""
+        counter = QueryCounter()
+        started = time.perf_counter()
+        ok = True
+        try:
+            with connection.execute_wrapper(counter):
+                result = func()
+        except Exception:
+            ok, result = False, None
+        self.samples.append((time.perf_counter() - started, counter.count, ok))
+        if group is not None:
+            self.groups[group].append(len(self.samples) - 1)
+        return result
+
+    def timed(self, method, path, data=None, group=None, **extra):
+        response = self.timed_call(lambda: getattr(self.client, method)(path, data, **extra), group)
+        if response is not None and response.status_code >= 400:
+            self.samples[-1] = self.samples[-1][:2] + (False,)
+        return response
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+def summarize(samples, wall):
+    return {
+        'operations': len(samples),
+        'errors': sum(not ok for _seconds, _count, ok in samples),
+        'wall_s': round(wall, 3),
+        'throughput_ops': round(len(samples) / wall, 1) if wall else None,
+        **summarize_latency(samples),
+    }
+
+
+def summarize_latency(samples):
+    latencies = sorted(seconds * 1000 for seconds, _queries, _ok in samples)
+    queries = [count for _seconds, count, _ok in samples]
+    return {
+        'latency_ms': {
+            'p50': _round(percentile(latencies, 50)),
+            'p95': _round(percentile(latencies, 95)),
+            'p99': _round(percentile(latencies, 99)),
+            'mean': _round(statistics.fmean(latencies)) if latencies else None,
+            'max': _round(latencies[-1]) if latencies else None,
+        },
+        'queries': {
+            'mean': round(statistics.fmean(queries), 2) if queries else None,
+            'max': max(queries, default=None),
+        },
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def run_scenario(name, requests=200, concurrency=4, seed=0):
+    func = SCENARIOS[name]
+    users = list(User.objects.filter(email__startswith=EMAIL_PREFIX).order_by('id')[:concurrency])
+    if len(users) < concurrency:
+        raise ValueError(f"Need {concurrency} seeded users, found {len(users)}; run with --seed first")
+    service_ids = list(Service.objects.filter(title__startswith=TITLE_PREFIX).values_list('id', flat=True))
+
+    sessions = [Session(user, service_ids, seed + index) for index, user in enumerate(users)]
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker(session):
+        try:
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                func(session)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(session,)) for session in sessions]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    samples = [sample for session in sessions for sample in session.samples]
+    result = dict(summarize(samples, wall), concurrency=concurrency)
+    grouped = defaultdict(list)
+    for session in sessions:
+        for label, indexes in session.groups.items():
+            grouped[label].extend(session.samples[index] for index in indexes)
+    if grouped:
+        # in the order the scenario first used the labels
+        result['groups'] = {label: dict(operations=len(group), **summarize_latency(group))
+                            for label, group in grouped.items()}
+    return result
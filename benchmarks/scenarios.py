@@ -0,0 +1,166 @@
+"""
+Benchmark scenarios. Each one is a function taking a ``Session`` (one per
+simulated client) and doing one operation; only calls made through
+``session.timed`` / ``session.timed_call`` are measured, so per-operation
+setup (filling a cart before a checkout...) doesn't skew the numbers.
+"""
+from types import SimpleNamespace
+
+from django.db.models import Q
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import CachedJWTAuthentication, StatelessJWTAuthentication
+from api.throttling import TokenBucketThrottle
+
+from service import cache
+from service.models import Order, Service
+
+from .seed import WORDS
+
+API = '/api/v1'
+ORDERINGS = ('-average_rating', 'price', '-price', '-id')
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def _random_services(session, count):
+    return session.rng.sample(session.service_ids, min(count, len(session.service_ids)))
+
+
+@scenario('browse')
+def browse(session):
+    session.timed('get', f"{API}/services/", {'ordering': session.rng.choice(ORDERINGS), 'page_size': 20})
+
+
+@scenario('browse_uncached')
+def browse_uncached(session):
+    # same request as "browse" with the catalog cache invalidated every time
+    cache.bump_version()
+    session.timed('get', f"{API}/services/", {'ordering': session.rng.choice(ORDERINGS), 'page_size': 20})
+
+
+# upper bounds of the page depth ranges deep_page reports latency for
+DEPTH_BUCKETS = (1, 10, 25, 50, 100, 250)
+
+
+def depth_label(depth):
+    lower = 1
+    for bound in DEPTH_BUCKETS:
+        if depth <= bound:
+            return f"pages {lower}-{bound}" if lower < bound else f"page {bound}"
+        lower = bound + 1
+    return f"pages {lower}+"
+
+
+@scenario('deep_page')
+def deep_page(session):
+    # follow the keyset cursor; each client walks further down the catalog and starts over
+    # at the end. Reported per page depth too ("groups"): keyset latency should stay flat.
+    url = session.state.get('next')
+    depth = session.state['depth'] + 1 if url else 1
+    url = url or f"{API}/services/?ordering=-average_rating&page_size=20"
+    response = session.timed('get', url, group=depth_label(depth))
+    session.state['next'] = response.json().get('next') if response.status_code == 200 else None
+    session.state['depth'] = depth
+
+
+@scenario('search')
+def search(session):
+    session.timed('get', f"{API}/services/", {'q': session.rng.choice(WORDS)})
+
+
+@scenario('search_icontains')
+def search_icontains(session):
+    # the pre-full-text query, for comparison with "search"
+    word = session.rng.choice(WORDS)
+    session.timed_call(lambda: list(Service.objects
+                                    .filter(Q(title__icontains=word) | Q(description__icontains=word))
+                                    .order_by('-id')[:20]))
+
+
+@scenario('conditional_get')
+def conditional_get(session):
+    if 'etag' not in session.state:
+        session.state['etag'] = session.client.get(f"{API}/services/").headers.get('ETag')
+    session.timed('get', f"{API}/services/", HTTP_IF_NONE_MATCH=session.state['etag'])
+
+
+@scenario('cart_add')
+def cart_add(session):
+    session.timed('post', f"{API}/cart/items/bulk/",
+                  [{'service_id': session.rng.choice(session.service_ids), 'quantity': 1}], format='json')
+
+
+@scenario('cart_summary')
+def cart_summary(session):
+    if not session.state.get('cart_filled'):
+        operations = [{'service_id': pk, 'quantity': 1, 'op': 'set'} for pk in _random_services(session, 50)]
+        session.client.post(f"{API}/cart/items/bulk/", operations, format='json')
+        session.state['cart_filled'] = True
+    session.timed('get', f"{API}/cart/", {'view': 'summary'})
+
+
+@scenario('checkout')
+def checkout(session):
+    operations = [{'service_id': pk, 'quantity': 1} for pk in _random_services(session, 3)]
+    session.client.post(f"{API}/cart/items/bulk/", operations, format='json')
+    session.timed('post', f"{API}/orders/", {}, format='json')
+
+
+@scenario('review_post')
+def review_post(session):
+    session.timed('post', f"{API}/reviews/", {'service': session.rng.choice(session.service_ids),
+                                              'rating': session.rng.randint(1, 5), 'comment': 'bench'},
+                  format='json')
+
+
+@scenario('callback_replay')
+def callback_replay(session):
+    # the gateway retrying the same success callback: every call after the first is a duplicate
+    if 'tran_id' not in session.state:
+        order = Order.objects.create(user=session.user)
+        session.state['tran_id'] = f"txn_{order.pk}"
+    session.timed('post', f"{API}/payment/success/", {'tran_id': session.state['tran_id'], 'val_id': f"val_{session.state['tran_id']}", 'status': 'VALID'})
+
+
+def _authenticate(session, authenticator):
+    request = Request(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"JWT {session.token}"))
+    session.timed_call(lambda: authenticator.authenticate(request))
+
+
+# request.user resolution alone, per JWT_AUTH_MODE
+@scenario('auth_db')
+def auth_db(session):
+    _authenticate(session, JWTAuthentication())
+
+
+@scenario('auth_cached')
+def auth_cached(session):
+    _authenticate(session, CachedJWTAuthentication())
+
+
+# measures the DB lookup unless AUTH_USER_CACHE['SHARED_CACHE'] is set (REDIS_URL)
+@scenario('auth_stateless')
+def auth_stateless(session):
+    _authenticate(session, StatelessJWTAuthentication())
+
+
+@scenario('throttle')
+def throttle(session):
+    # the throttle decision alone (rate lookup + bucket take against THROTTLE_STORE), as the
+    # contact form's create sees it; once the bucket is empty every call is a refusal
+    if 'request' not in session.state:
+        request = Request(APIRequestFactory().post('/'))
+        request.user = session.user
+        session.state['request'] = request
+    view = SimpleNamespace(throttle_scope='contactmessage', action='create')
+    session.timed_call(lambda: TokenBucketThrottle().allow_request(session.state['request'], view))
@@ -0,0 +1,103 @@
+"""
+Bulk seeding of benchmark data. Everything created here is recognisable by
+its prefix (``bench-`` emails, ``Bench`` titles) so ``flush`` can remove it
+without touching real rows. Both bulk insert/delete past the signal and
+view hooks, so they finish by recomputing ratings and the analytics rollups.
+"""
+import random
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from api import search
+from service import ratings, rollups
+from service.models import Cart, CartItem, Order, OrderItem, Review, Service
+from users.models import User
+
+EMAIL_PREFIX = 'bench-'
+TITLE_PREFIX = 'Bench'
+PASSWORD = 'bench-password'
+WORDS = ('cleaning', 'shifting', 'plumbing', 'painting', 'repair', 'garden', 'kitchen', 'bathroom',
+         'electric', 'laundry', 'window', 'carpet', 'pest', 'roof', 'moving', 'deep', 'express', 'weekly')
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def seed(users=100, services=1000, reviews=5000, carts=50, orders=500, batch_size=1000, rng=None):
+    rng = rng or random.Random(42)
+    counts = {}
+    with transaction.atomic():
+        start = User.objects.filter(email__startswith=EMAIL_PREFIX).count()
+        password = make_password(PASSWORD)
+        for batch in chunks((User(email=f"{EMAIL_PREFIX}{start + i}@example.com", password=password,
+                                  first_name='Bench', last_name=str(start + i))
+                             for i in range(users)), batch_size):
+            User.objects.bulk_create(batch)
+        counts['users'] = users
+
+        for batch in chunks((Service(title=f"{TITLE_PREFIX} {rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+                                     description=' '.join(rng.choices(WORDS, k=12)),
+                                     price=Decimal(rng.randint(500, 50000)) / 100,
+                                     duration_minutes=rng.choice((30, 60, 90, 120)))
+                             for i in range(services)), batch_size):
+            Service.objects.bulk_create(batch)
+        counts['services'] = services
+
+        user_ids = list(User.objects.filter(email__startswith=EMAIL_PREFIX).values_list('id', flat=True))
+        service_ids = list(Service.objects.filter(title__startswith=TITLE_PREFIX).values_list('id', flat=True))
+
+        for batch in chunks((Review(service_id=rng.choice(service_ids), user_id=rng.choice(user_ids),
+                                    rating=rng.randint(1, 5), comment='bench')
+                             for _ in range(reviews)), batch_size):
+            Review.objects.bulk_create(batch)
+        counts['reviews'] = reviews
+
+        cart_users = user_ids[:carts]
+        Cart.objects.bulk_create([Cart(user_id=user_id) for user_id in cart_users], ignore_conflicts=True)
+        cart_ids = Cart.objects.filter(user_id__in=cart_users).values_list('id', flat=True)
+        for batch in chunks((CartItem(cart_id=cart_id, service_id=service_id, quantity=rng.randint(1, 3))
+                             for cart_id in cart_ids
+                             for service_id in rng.sample(service_ids, min(len(service_ids), rng.randint(1, 5)))),
+                            batch_size):
+            CartItem.objects.bulk_create(batch, ignore_conflicts=True)
+        counts['carts'] = len(cart_users)
+
+        prices = dict(Service.objects.filter(pk__in=service_ids).values_list('id', 'price'))
+        statuses = [status for status, _label in Order.ORDER_STATUS]
+        for batch in chunks(range(orders), batch_size):
+            created = Order.objects.bulk_create([Order(user_id=rng.choice(user_ids), status=rng.choice(statuses))
+                                                 for _ in batch])
+            items = []
+            for order in created:
+                total = Decimal('0.00')
+                for service_id in rng.sample(service_ids, min(len(service_ids), rng.randint(1, 3))):
+                    quantity = rng.randint(1, 3)
+                    subtotal = prices[service_id] * quantity
+                    total += subtotal
+                    items.append(OrderItem(order=order, service_id=service_id, service_title='bench',
+                                           unit_price=prices[service_id], quantity=quantity, subtotal=subtotal))
+                order.total_amount = total
+            OrderItem.objects.bulk_create(items, batch_size=batch_size)
+            Order.objects.bulk_update(created, ['total_amount'], batch_size=batch_size)
+        counts['orders'] = orders
+
+        ratings.recompute_all(batch_size=batch_size)
+        rollups.rebuild(batch_size=batch_size)
+        search.refresh_search_vector(Service)
+    return counts
+
+
+def flush():
+    """Delete everything seeded by ``seed`` (orders, carts and reviews cascade from users)."""
+    with transaction.atomic():
+        users = User.objects.filter(email__startswith=EMAIL_PREFIX).delete()[0]
+        services = Service.objects.filter(title__startswith=TITLE_PREFIX).delete()[0]
+        ratings.recompute_all()
+        rollups.rebuild()
+    return {'users_and_related': users, 'services_and_related': services}
@@ -0,0 +1,14 @@
+import os
+
+# DJANGO_ENV picks the settings module when DJANGO_SETTINGS_MODULE isn't set
+SETTINGS_MODULES = {
+    'development': 'household_servide.settings',
+    'production': 'household_servide.settings_production',
+}
+
+
+def configure_settings():
+    env = os.environ.get('DJANGO_ENV', 'development')
+    if env not in SETTINGS_MODULES:
+        raise RuntimeError(f"DJANGO_ENV must be one of {', '.join(SETTINGS_MODULES)}, not {env!r}")
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', SETTINGS_MODULES[env])
@@ -7,10 +7,10 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
-import os
-
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'household_servide.settings')
+from household_servide import configure_settings
+
+configure_settings()
 
 application = get_asgi_application()
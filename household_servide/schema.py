@@ -0,0 +1,46 @@
+"""
+OpenAPI schema generation (drf_yasg). Only imported by ``manage.py
+build_schema``, the swagger/redoc pages and api.openapi's fallback when no
+artifact has been built; see household_servide.urls.
+"""
+from functools import lru_cache
+
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+INFO = openapi.Info(
+   title="Household Service Providing Platform API",
+   default_version='v1',
+   description="API documentation for the Household Service Providing Platform",
+   terms_of_service="https://www.google.com/policies/terms/",
+   contact=openapi.Contact(email="mdmainulislamnerob52@gmail.com"),
+   license=openapi.License(name="BSD License"),
+)
+
+schema_view = get_schema_view(
+   INFO,
+   public=True,
+   permission_classes=(permissions.AllowAny,),
+)
+
+
+@lru_cache(maxsize=None)
+def ui_view(renderer):
+    # the page itself is cheap; the spec it loads is SPEC_URL, the prebuilt artifact
+    return schema_view.with_ui(renderer, cache_timeout=0)
+
+
+def generate(extra=None):
+    """The full public schema, as the views would build it for an anonymous request."""
+    schema = OpenAPISchemaGenerator(INFO).get_schema(request=None, public=True)
+    schema.update(extra or {})
+    return schema
+
+
+def encode(schema, fmt):
+    if fmt == 'yaml':
+        return OpenAPICodecYaml(validators=[]).encode(schema)
+    return OpenAPICodecJson(validators=[], pretty=True).encode(schema)
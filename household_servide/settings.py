@@ -2,7 +2,6 @@
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
-import cloudinary
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -30,15 +29,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'drf_yasg',
     'rest_framework',
     'djoser',
     'rest_framework_simplejwt',
     'users',
     'service',
-    "debug_toolbar",
+    "debug_toolbar",  # dropped by settings_production
     'api',
     'shop',
+    'jobs',
+    'benchmarks',
     "corsheaders",
 
     
@@ -46,17 +48,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    'api.metrics.RequestMetricsMiddleware',
+    "debug_toolbar.middleware.DebugToolbarMiddleware",  # dropped by settings_production
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # before CommonMiddleware, so its redirects carry CORS headers too
+    "corsheaders.middleware.CorsMiddleware",
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "corsheaders.middleware.CorsMiddleware",
-    "django.middleware.common.CommonMiddleware",
 ]
 
 ROOT_URLCONF = 'household_servide.urls'
@@ -102,6 +105,29 @@ DATABASES = {
 
 
 
+# Cache
+# Local memory per process by default; set REDIS_URL (needs the `redis` package)
+# to share it between workers.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'household',
+        }
+    }
+
+# serialized catalog pages (service.cache)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -124,17 +150,30 @@ AUTH_PASSWORD_VALIDATORS = [
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
-cloudinary.config(
-    cloud_name=config('cloud_name'),
-    api_key=config('cloudinary_api_key'),
-    api_secret=config('cloudinary_api_secret'),
-    secure=True
-)
+# Applied to the cloudinary SDK by ApiConfig.ready(), not here, so reading
+# settings doesn't import it
+CLOUDINARY = {
+    'cloud_name': config('cloud_name'),
+    'api_key': config('cloudinary_api_key'),
+    'api_secret': config('cloudinary_api_secret'),
+    'secure': True,
+}
 
 
 #Media storage settings
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# 'deferred': stage uploaded images locally and push them to the remote store
+# from a job (api.media); needs `runworkers` sharing MEDIA_ROOT with the web
+# process. 'inline': upload during the request.
+MEDIA_UPLOAD_MODE = config('MEDIA_UPLOAD_MODE', default='inline')
+# api.media.LocalFakeBackend keeps everything under MEDIA_ROOT for offline runs
+MEDIA_BACKEND = config('MEDIA_BACKEND', default='api.media.CloudinaryBackend')
+IMAGE_VARIANTS = {
+    'thumb': (150, 150),
+    'card': (400, 300),
+}
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -159,14 +198,88 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# How JWT requests resolve request.user (api.authentication):
+#   db        - simplejwt's stock lookup, one SELECT per request
+#   cached    - in-process LRU of users, invalidated on user save
+#   stateless - user built from token claims, DB only for non-claim fields;
+#               needs AUTH_USER_CACHE['SHARED_CACHE'], else it behaves like db
+JWT_AUTH_MODE = config('JWT_AUTH_MODE', default='cached')
+JWT_AUTH_CLASSES = {
+    'db': 'rest_framework_simplejwt.authentication.JWTAuthentication',
+    'cached': 'api.authentication.CachedJWTAuthentication',
+    'stateless': 'api.authentication.StatelessJWTAuthentication',
+}
+# Set SHARED_CACHE to a cache alias (with REDIS_URL, 'default') so token
+# revocations reach every process immediately; otherwise TTL bounds staleness.
+AUTH_USER_CACHE = {
+    'TTL': config('AUTH_USER_CACHE_TTL', default=60, cast=int),
+    'MAX_SIZE': 1024,
+    'SHARED_CACHE': 'default' if REDIS_URL else None,
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        
+        JWT_AUTH_CLASSES[JWT_AUTH_MODE],
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.metrics.InstrumentedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
+    # no-op for views without a THROTTLE_RATES entry
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.TokenBucketThrottle',
+    ),
+}
+
+# Token-bucket limits (api.throttling): "N/period" refills N tokens per period, optionally
+# "N/period burst M" for a bigger bucket. Keyed "<scope>.<action>" or "<scope>"; the scope
+# is the view's throttle_scope, router basename or URL name. Anonymous clients are
+# limited per IP, signed-in ones per user.
+THROTTLE_RATES = {
+    'contactmessage.create': '5/10m burst 3',
+    # djoser
+    'user.create': '5/h',
+    'user.activation': '10/h',
+    'user.resend_activation': '5/h',
+    'user.reset_password': '5/h',
+    'user.reset_password_confirm': '10/h',
+    'user.set_password': '10/h',
+    # simplejwt
+    'jwt-create': '10/min burst 5',
+    'jwt-refresh': '30/min',
+    'jwt-verify': '60/min',
+    # both initiate-payment views share these buckets
+    'initiate-payment': '10/min burst 5',
 }
+# Per-process buckets by default; shared through Redis when REDIS_URL is set
+THROTTLE_STORE = {
+    'BACKEND': 'api.throttling.RedisBucketStore' if REDIS_URL else 'api.throttling.MemoryBucketStore',
+    'LOCATION': REDIS_URL,
+}
+
+# Request metrics (api.metrics), scraped from /metrics/. Without a token only
+# staff sessions can read them.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Max SQL queries per route name on GET/HEAD, authentication included. Going over is
+# logged; under `manage.py test` it raises (api.test_runner), so tests catch N+1 regressions.
+QUERY_BUDGETS = {
+    'service-list': 3,
+    'service-detail': 3,
+    'service-overview': 4,
+    'product-list': 3,
+    'review-list': 3,
+    'order-list': 5,
+    'order-detail': 5,
+    'cart-me': 3,
+    'cart-item-list': 2,
+    'cart-item-detail': 2,
+}
+QUERY_BUDGET_ACTION = config('QUERY_BUDGET_ACTION', default='log')
+TEST_RUNNER = 'api.test_runner.TestRunner'
 SIMPLE_JWT = {
    'AUTH_HEADER_TYPES': ('JWT',),
+   'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.TokenObtainPairSerializer',
    "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
 }
 
@@ -178,7 +291,13 @@ DJOSER = {
 
 }
 
+# /swagger/ and /redoc/ (household_servide.schema, drf_yasg loaded on first use)
+API_SCHEMA_VIEWS = config('API_SCHEMA_VIEWS', default=True, cast=bool)
+# where `manage.py build_schema` writes openapi.json/.yaml, served at /schema/openapi.json (api.openapi)
+API_SCHEMA_DIR = BASE_DIR / 'schema'
+API_SCHEMA_CACHE_SECONDS = config('API_SCHEMA_CACHE_SECONDS', default=3600, cast=int)
 SWAGGER_SETTINGS = {
+    'SPEC_URL': 'schema-openapi',
     'SECURITY_DEFINITIONS': {
         'Bearer': {
             'type': 'apiKey',
@@ -188,11 +307,27 @@ SWAGGER_SETTINGS = {
         }
     }
 }
+REDOC_SETTINGS = {
+    'SPEC_URL': 'schema-openapi',
+}
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "https://household-service-providing-platfor-nine.vercel.app"
 ]
 
+# Payment gateway (service.payments). SSLCOMMERZ_BASE_URL points the client at
+# another host, e.g. `manage.py fake_gateway` for offline testing.
+SSLCOMMERZ = {
+    'STORE_ID': config('SSLCOMMERZ_STORE_ID', default='phima67ddc8dba290b'),
+    'STORE_PASS': config('SSLCOMMERZ_STORE_PASS', default='phima67ddc8dba290b@ssl'),
+    'SANDBOX': config('SSLCOMMERZ_SANDBOX', default=True, cast=bool),
+    'BASE_URL': config('SSLCOMMERZ_BASE_URL', default=''),
+    'TIMEOUT': config('SSLCOMMERZ_TIMEOUT', default=15.0, cast=float),
+    'POOL_SIZE': config('SSLCOMMERZ_POOL_SIZE', default=10, cast=int),
+}
+# base delay in seconds for job retries, doubled per attempt (jobs.queue)
+JOBS_RETRY_BACKOFF = config('JOBS_RETRY_BACKOFF', default=5, cast=int)
+
 FRONTEND_URL=config('FRONTEND_URL', default='http://localhost:5173')
 BACKEND_URL=config('BACKEND_URL', default='http://localhost:8000')
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+Production settings: the development settings minus debug-only apps,
+middleware and the schema views, with persistent database connections and
+cached templates.
+Selected with DJANGO_ENV=production (see household_servide.configure_settings).
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, SECRET_KEY, TEMPLATES, config
+
+DEBUG = config('DEBUG', default=False, cast=bool)
+SECRET_KEY = config('SECRET_KEY', default=SECRET_KEY)
+
+DEBUG_APPS = ('debug_toolbar',)
+DEBUG_MIDDLEWARE = ('debug_toolbar.middleware.DebugToolbarMiddleware',)
+# no interactive docs unless asked for, and then drf_yasg's templates are needed
+API_SCHEMA_VIEWS = config('API_SCHEMA_VIEWS', default=False, cast=bool)
+if not API_SCHEMA_VIEWS:
+    DEBUG_APPS += ('drf_yasg',)
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEBUG_APPS]
+MIDDLEWARE = [name for name in MIDDLEWARE if name not in DEBUG_MIDDLEWARE]
+
+# Keep connections open between requests instead of reconnecting on each one;
+# CONN_HEALTH_CHECKS pings a reused connection once per request so a server-side
+# disconnect costs a reconnect, not a failed request.
+DATABASES = {alias: dict(db) for alias, db in DATABASES.items()}
+DATABASES['default'].update(
+    CONN_MAX_AGE=config('DB_CONN_MAX_AGE', default=60, cast=int),
+    CONN_HEALTH_CHECKS=True,
+)
+# DB_POOL_MAX_SIZE > 0 switches to Django's connection pool instead. That needs
+# psycopg 3 with its pool extra (`psycopg[pool]`), not the psycopg2 in requirements.txt,
+# and doesn't combine with persistent connections.
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=0, cast=int)
+if DB_POOL_MAX_SIZE:
+    DATABASES['default'].update(CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False)
+    DATABASES['default']['OPTIONS'] = {
+        **DATABASES['default'].get('OPTIONS', {}),
+        'pool': {'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int), 'max_size': DB_POOL_MAX_SIZE},
+    }
+
+# compiled templates kept in memory (loaders can't be combined with APP_DIRS)
+TEMPLATES = [dict(TEMPLATES[0], APP_DIRS=False, OPTIONS=dict(TEMPLATES[0]['OPTIONS'], loaders=[
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]))]
+
+# JSON only; the browsable API renders a full HTML page per response
+REST_FRAMEWORK = dict(REST_FRAMEWORK, DEFAULT_RENDERER_CLASSES=('api.metrics.InstrumentedJSONRenderer',))
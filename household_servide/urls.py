@@ -1,30 +1,34 @@
-
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from household_servide.views import api_root_view
+from api.metrics import metrics_view
+from api.openapi import schema_file_view
+
+
+def schema_ui(renderer):
+    # drf_yasg and its inspectors load on the first docs request, not at startup
+    def view(request, *args, **kwargs):
+        from household_servide.schema import ui_view
+
+        return ui_view(renderer)(request, *args, **kwargs)
+    return view
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Household Service Providing Platform API",
-      default_version='v1',
-      description="API documentation for the Household Service Providing Platform",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="mdmainulislamnerob52@gmail.com"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api-auth/', include('rest_framework.urls')),
     path('api/v1/', include('api.urls')),
     path('', api_root_view),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('metrics/', metrics_view, name='metrics'),
 
 ]
+
+if settings.API_SCHEMA_VIEWS:
+    urlpatterns += [
+        path('swagger/', schema_ui('swagger'), name='schema-swagger-ui'),
+        path('redoc/', schema_ui('redoc'), name='schema-redoc'),
+        # prebuilt by manage.py build_schema; the pages above load this (SPEC_URL)
+        path('schema/openapi.json', schema_file_view, {'fmt': 'json'}, name='schema-openapi'),
+        path('schema/openapi.yaml', schema_file_view, {'fmt': 'yaml'}, name='schema-openapi-yaml'),
+    ]
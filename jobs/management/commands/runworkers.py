@@ -0,0 +1,48 @@
+import json
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs import queue
+from jobs.process import serve
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (database queue, no broker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=2, help="Worker threads per process")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--stale-timeout', type=int, default=300,
+                            help="Requeue RUNNING jobs older than this many seconds on startup")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is drained")
+        parser.add_argument('--stats', action='store_true', help="Print per-task timing metrics and exit")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue.stats(), indent=2))
+            return
+
+        if options['processes'] <= 1:
+            worker = Worker(threads=options['threads'], poll_interval=options['poll_interval'],
+                            stale_timeout=options['stale_timeout'], burst=options['burst'])
+            signal.signal(signal.SIGTERM, worker.stop)
+            signal.signal(signal.SIGINT, worker.stop)
+            worker.run()
+            return
+
+        # spawn, not fork: children must not share the parent's DB connection
+        context = multiprocessing.get_context('spawn')
+        worker_options = {key: options[key] for key in ('threads', 'poll_interval', 'stale_timeout', 'burst')}
+        processes = [context.Process(target=serve, args=(worker_options,)) for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
@@ -0,0 +1,16 @@
+"""
+Entry point for ``runworkers --processes N``. Kept free of model imports so
+spawned children can unpickle it before ``django.setup()`` has run.
+"""
+import signal
+
+
+def serve(options):
+    import django
+    django.setup()
+
+    from .worker import Worker
+    worker = Worker(**options)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
@@ -0,0 +1,132 @@
+"""
+Database-backed job queue: no broker, the Job table is the queue.
+
+    @task('contact.notify')
+    def notify(message_id): ...
+
+    enqueue('contact.notify', message_id=msg.pk)
+
+Jobs are inserted in the caller's transaction (a rolled back request never
+leaves a job behind) and claimed by ``manage.py runworkers`` with
+``SELECT ... FOR UPDATE SKIP LOCKED`` so any number of workers can poll the
+same table without handing out a job twice.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+def task(name, max_attempts=3):
+    def register(func):
+        _tasks[name] = (func, max_attempts)
+        return func
+    return register
+
+
+def get_task(name):
+    return _tasks[name]
+
+
+def enqueue(name, delay=None, **payload):
+    if name not in _tasks:
+        raise KeyError(f"Unknown task {name!r}")
+    run_at = timezone.now() + timedelta(seconds=delay) if delay else timezone.now()
+    return Job.objects.create(name=name, payload=payload, run_at=run_at, max_attempts=_tasks[name][1])
+
+
+def claim(worker_id, limit=1):
+    """Lock and mark up to ``limit`` due jobs as RUNNING for this worker."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(Job.objects
+                    .select_for_update(skip_locked=True)
+                    .filter(status='QUEUED', run_at__lte=now)
+                    .order_by('run_at', 'id')[:limit])
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='RUNNING', locked_by=worker_id, started_at=now)
+    return jobs
+
+
+def backoff(attempts):
+    base = getattr(settings, 'JOBS_RETRY_BACKOFF', 5)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def run(job):
+    """Execute one claimed job and record its outcome and timing."""
+    started = time.perf_counter()
+    attempts = job.attempts + 1
+    try:
+        func, _max_attempts = get_task(job.name)
+        func(**job.payload)
+    except Exception:
+        elapsed = (time.perf_counter() - started) * 1000
+        error = traceback.format_exc()
+        retry = attempts < job.max_attempts
+        logger.warning("Job %s #%s failed (attempt %s/%s)", job.name, job.pk, attempts, job.max_attempts)
+        Job.objects.filter(pk=job.pk).update(
+            status='QUEUED' if retry else 'FAILED',
+            attempts=attempts,
+            run_at=timezone.now() + backoff(attempts) if retry else job.run_at,
+            last_error=error,
+            locked_by='',
+            finished_at=None if retry else timezone.now(),
+            duration_ms=elapsed,
+        )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status='DONE',
+        attempts=attempts,
+        locked_by='',
+        finished_at=timezone.now(),
+        duration_ms=(time.perf_counter() - started) * 1000,
+    )
+    return True
+
+
+def requeue_stale(timeout):
+    """
+    Put RUNNING jobs whose worker died (started more than ``timeout`` seconds ago)
+    back in the queue. The lost run counts as an attempt, so a job that keeps
+    killing its worker is marked FAILED after ``max_attempts``. Returns
+    (requeued, failed).
+    """
+    now = timezone.now()
+    stale = Job.objects.filter(status='RUNNING', started_at__lt=now - timedelta(seconds=timeout))
+    with transaction.atomic():
+        failed = (stale
+                  .filter(attempts__gte=F('max_attempts') - 1)
+                  .update(status='FAILED', attempts=F('attempts') + 1, locked_by='', finished_at=now,
+                          last_error=f"Worker lost (still running after {timeout}s)"))
+        requeued = stale.update(status='QUEUED', attempts=F('attempts') + 1, locked_by='', run_at=now)
+    if failed:
+        logger.warning("%s stale job(s) failed after their last attempt", failed)
+    return requeued, failed
+
+
+def stats():
+    """Per task: job counts by status and average / max duration of finished runs."""
+    rows = (Job.objects
+            .order_by()
+            .values('name', 'status')
+            .annotate(jobs=Count('id'), avg_ms=Avg('duration_ms'), max_ms=Max('duration_ms')))
+    result = {}
+    for row in rows:
+        result.setdefault(row['name'], {})[row['status']] = {
+            'jobs': row['jobs'], 'avg_ms': row['avg_ms'], 'max_ms': row['max_ms'],
+        }
+    return result
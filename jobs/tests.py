@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+
+from jobs import queue
+from jobs.models import Job
+from service.tests import run_in_parallel
+
+calls = []
+
+
+@queue.task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@queue.task('tests.crash', max_attempts=2)
+def crash():
+    raise RuntimeError('boom')
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_hands_out_due_jobs_once(self):
+        first, second = (queue.enqueue('tests.record', value=n) for n in range(2))
+        queue.enqueue('tests.record', delay=60, value=2)
+        self.assertEqual([job.pk for job in queue.claim('w1')], [first.pk])
+        self.assertEqual([job.pk for job in queue.claim('w2', limit=5)], [second.pk])
+        self.assertEqual(queue.claim('w3'), [])
+        self.assertEqual(Job.objects.get(pk=first.pk).locked_by, 'w1')
+
+    def test_run_records_success(self):
+        queue.enqueue('tests.record', value='x')
+        job, = queue.claim('w1')
+        self.assertTrue(queue.run(job))
+        job.refresh_from_db()
+        self.assertEqual((calls, job.status, job.attempts), (['x'], 'DONE', 1))
+
+    def test_failure_is_retried_with_backoff_then_fails(self):
+        job = queue.enqueue('tests.crash')
+        self.assertFalse(queue.run(queue.claim('w1')[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('QUEUED', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        self.assertFalse(queue.run(queue.claim('w1')[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+
+    def test_stale_job_is_requeued_until_its_attempts_run_out(self):
+        job = queue.enqueue('tests.crash')
+        for expected, status in (((1, 0), 'QUEUED'), ((0, 1), 'FAILED')):
+            queue.claim('dead-worker')
+            Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(minutes=10))
+            self.assertEqual(queue.requeue_stale(60), expected)
+            job.refresh_from_db()
+            self.assertEqual(job.status, status)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(queue.claim('w1'), [])
+
+    def test_running_job_is_not_requeued_early(self):
+        queue.enqueue('tests.record', value='x')
+        queue.claim('w1')
+        self.assertEqual(queue.requeue_stale(60), (0, 0))
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class ClaimConcurrencyTests(TransactionTestCase):
+    def test_parallel_claims_never_share_a_job(self):
+        for n in range(8):
+            queue.enqueue('tests.record', value=n)
+        claimed = []
+        run_in_parallel(*[lambda worker=f'w{n}': claimed.extend(job.pk for job in queue.claim(worker, limit=2))
+                          for n in range(4)])
+        self.assertEqual(sorted(claimed), sorted(Job.objects.values_list('pk', flat=True)))
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_claim_skips_a_locked_job(self):
+        first, second = (queue.enqueue('tests.record', value=n) for n in range(2))
+        claimed = []
+        with transaction.atomic():
+            # another worker mid-claim holds the first job's row lock
+            Job.objects.select_for_update().get(pk=first.pk)
+            run_in_parallel(lambda: claimed.extend(queue.claim('w2')))
+        self.assertEqual([job.pk for job in claimed], [second.pk])
@@ -0,0 +1,57 @@
+import logging
+import os
+import socket
+import threading
+
+from django.db import DatabaseError, close_old_connections, connection
+
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Poll the Job table from ``threads`` threads. With ``burst`` the worker
+    exits once the queue is empty instead of polling forever.
+    """
+
+    def __init__(self, threads=1, poll_interval=1.0, stale_timeout=300, burst=False):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.burst = burst
+        self.stopping = threading.Event()
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self):
+        queue.requeue_stale(self.stale_timeout)
+        threads = [threading.Thread(target=self.loop, args=(f"{self.name}:{index}",), daemon=True)
+                   for index in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def loop(self, worker_id):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                try:
+                    jobs = queue.claim(worker_id)
+                except DatabaseError:
+                    logger.exception("Worker %s could not claim jobs", worker_id)
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                if not jobs:
+                    if self.burst:
+                        return
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                for job in jobs:
+                    queue.run(job)
+        finally:
+            connection.close()
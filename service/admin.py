@@ -1,9 +1,35 @@
 from django.contrib import admin
-from service.models import Service, Review, Cart, CartItem, Order, OrderItem
+from service.models import Service, Review, Cart, CartItem, Order, OrderItem, ServiceDailyStats, OrderDailyStats
 # Register your models here.
 admin.site.register(Service)
 admin.site.register(Review)
 admin.site.register(Cart)
 admin.site.register(CartItem)
 admin.site.register(Order)
-admin.site.register(OrderItem)
\ No newline at end of file
+admin.site.register(OrderItem)
+
+
+@admin.register(ServiceDailyStats)
+class ServiceDailyStatsAdmin(admin.ModelAdmin):
+    # maintained by service.rollups; rebuild_rollups instead of editing by hand
+    list_display = ('day', 'service', 'quantity_sold', 'revenue', 'review_count', 'rating_sum')
+    list_filter = ('day',)
+    list_select_related = ('service',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OrderDailyStats)
+class OrderDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('day', 'status', 'orders', 'total_amount')
+    list_filter = ('status',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ServiceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'service'
+
+    def ready(self):
+        from api import search
+        from .models import Service
+        from . import signals  # noqa: F401
+        search.register(Service, ('title', 'description'))
@@ -0,0 +1,99 @@
+"""
+Read-through cache for the public service catalog.
+
+Serialized list pages and detail payloads are stored under a key that
+embeds a catalog version. Any Service/Review write bumps the version
+(see service.signals), which orphans every cached page at once instead of
+hunting down individual keys; orphans simply expire. A missing version
+(first use, or evicted) is seeded from the clock, never from 1, so it
+can't land on a version whose pages are still cached.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'catalog:version'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def _seed(cache):
+    # nanoseconds since the epoch: past any version an earlier seed has been bumped to
+    seed = time.time_ns()
+    cache.add(VERSION_KEY, seed, timeout=None)
+    return cache.get(VERSION_KEY, seed)
+
+
+def get_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = _seed(cache)
+    return version
+
+
+def bump_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # key evicted or never set: a fresh seed already differs from every cached page's version
+        _seed(cache)
+
+
+def record(hit):
+    with _stats_lock:
+        _stats['hits' if hit else 'misses'] += 1
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def make_key(request, kind):
+    params = sorted(request.query_params.lists())
+    raw = f"{request.get_host()}|{request.path}|{params}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"catalog:v{get_version()}:{kind}:{digest}"
+
+
+class CatalogCacheMixin:
+    """
+    Serve list/retrieve from the catalog cache. Only successful responses are
+    stored; the key covers path and every query param (ordering, q, cursor...).
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, 'list', lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, 'detail', lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs))
+
+    def cached_response(self, request, kind, build):
+        cache = get_cache()
+        key = make_key(request, kind)
+        data = cache.get(key)
+        if data is not None:
+            record(hit=True)
+            return Response(data)
+
+        record(hit=False)
+        response = build()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, timeout=get_timeout())
+        return response
@@ -0,0 +1,156 @@
+"""
+Gateway callback ingestion for payment_success / payment_fail / payment_cancel.
+
+The callback URLs are public and unsigned, so a success callback proves
+nothing by itself. The request path only does cheap, idempotent work:
+store the raw payload on the order's PaymentIntent (deduplicated by
+tran_id), mark the order's payment VALIDATING and queue a
+``payments.validate`` job (see service.tasks, run by ``manage.py
+runworkers``). Only that job, after the gateway's validation API confirms
+the val_id for this tran_id, moves the order to CONFIRMED /
+PAID. Success callbacks without a val_id are ignored. Gateway retries of
+an already-seen callback cost a single indexed SELECT.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.queue import enqueue
+
+from . import rollups
+from .models import Order, PaymentIntent
+
+logger = logging.getLogger(__name__)
+
+SUCCESS, FAILED, CANCELLED = 'SUCCESS', 'FAILED', 'CANCELLED'
+VALID_STATUSES = ('VALID', 'VALIDATED')
+
+
+def parse_order_id(tran_id):
+    # tran_id is "txn_<order id>" (see payments.build_session_payload)
+    try:
+        return int(str(tran_id).split('_', 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def seen_val_ids(provider_payload):
+    return provider_payload.get('val_ids') or [provider_payload.get('val_id')]
+
+
+def ingest(payload, outcome):
+    """
+    Record a gateway callback and apply its status transition.
+    Returns False for duplicates and callbacks that don't match an order.
+    """
+    tran_id = payload.get('tran_id')
+    order_id = parse_order_id(tran_id)
+    if order_id is None:
+        return False
+    val_id = payload.get('val_id')
+    if outcome == SUCCESS and not val_id:
+        # nothing to validate against the gateway, so nothing to act on
+        logger.warning("Ignoring success callback without val_id for %s", tran_id)
+        return False
+
+    existing = (PaymentIntent.objects
+                .filter(transaction_id=tran_id)
+                .values_list('pk', 'status', 'provider_payload')
+                .first())
+    if existing is not None and existing[1] == SUCCESS:
+        seen = seen_val_ids(existing[2])
+        if outcome != SUCCESS or val_id in seen:
+            # retry of a callback we already applied; a success is final
+            return False
+        # another val_id for the same transaction (the first may have been forged):
+        # validate it too, the order only becomes PAID through a validation that passes
+        with transaction.atomic():
+            PaymentIntent.objects.filter(pk=existing[0]).update(
+                provider_payload=dict(existing[2], val_ids=seen + [val_id]), updated_at=timezone.now())
+            enqueue('payments.validate', intent_id=existing[0], order_id=order_id, val_id=val_id)
+        return True
+    if existing is not None and existing[1] == outcome:
+        return False
+
+    with transaction.atomic():
+        if existing is not None:
+            changed = (PaymentIntent.objects
+                       .filter(pk=existing[0])
+                       .exclude(status__in=(outcome, SUCCESS))
+                       .update(status=outcome, provider_payload=payload, updated_at=timezone.now()))
+            if not changed:
+                return False
+            intent_id = existing[0]
+        else:
+            if not Order.objects.filter(pk=order_id).exists():
+                return False
+            intent, created = PaymentIntent.objects.get_or_create(
+                order_id=order_id,
+                defaults={'provider': 'sslcommerz', 'transaction_id': tran_id,
+                          'status': outcome, 'provider_payload': payload},
+            )
+            if not created:
+                # a concurrent duplicate got there first
+                return False
+            intent_id = intent.pk
+
+        apply_transition(order_id, outcome)
+        if outcome == SUCCESS:
+            # committed together with the intent, so the job never sees a missing row
+            enqueue('payments.validate', intent_id=intent_id, order_id=order_id, val_id=val_id)
+    return True
+
+
+def apply_transition(order_id, outcome):
+    """Callback side of the transition; a success only gets as far as VALIDATING."""
+    now = timezone.now()
+    if outcome == SUCCESS:
+        return (Order.objects
+                .filter(pk=order_id, status='PENDING', payment_status__in=('UNPAID', 'FAILED'))
+                .update(payment_status='VALIDATING', updated_at=now))
+    if outcome == FAILED:
+        return (Order.objects
+                .filter(pk=order_id, status='PENDING', payment_status='UNPAID')
+                .update(payment_status='FAILED', updated_at=now))
+    return 0
+
+
+def confirm_payment(order_id):
+    """Validated: PENDING -> CONFIRMED / PAID, once."""
+    with transaction.atomic():
+        changed = (Order.objects
+                   .filter(pk=order_id, status='PENDING')
+                   .exclude(payment_status='PAID')
+                   .update(status='CONFIRMED', payment_status='PAID', updated_at=timezone.now()))
+        if changed:
+            order = Order.objects.only('created_at', 'total_amount').get(pk=order_id)
+            rollups.order_status_changed(order, 'PENDING', 'CONFIRMED')
+    return changed
+
+
+def is_valid(result, tran_id):
+    """The gateway vouches for this val_id, and it belongs to this transaction."""
+    return result.get('status') in VALID_STATUSES and result.get('tran_id') == tran_id
+
+
+def validate_payment(intent_id, order_id, val_id):
+    """Job body: confirm a success callback with the gateway; only this marks an order PAID."""
+    from .payments import get_gateway  # HTTP client stack, only needed by workers
+
+    result = get_gateway().validate(val_id)
+    if result.get('failedreason'):
+        # transport error, not a verdict: raise so the job is retried
+        raise RuntimeError(f"Gateway validation unavailable: {result['failedreason']}")
+
+    intent = PaymentIntent.objects.get(pk=intent_id)
+    intent.provider_payload = dict(intent.provider_payload, validation=result)
+    intent.save(update_fields=['provider_payload', 'updated_at'])
+    if is_valid(result, intent.transaction_id):
+        confirm_payment(order_id)
+        return
+    logger.warning("Payment validation failed for order %s: %s", order_id, result.get('status'))
+    # a PAID order stays PAID: a later bogus val_id can't undo a validated payment
+    (Order.objects
+     .filter(pk=order_id, payment_status='VALIDATING')
+     .update(payment_status='FAILED', updated_at=timezone.now()))
@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Window
+
+from .models import Cart, CartItem
+
+_UNRESOLVED = object()
+
+
+def get_request_cart(request, create=False):
+    """
+    Resolve the current user's cart once per request (a single query) and
+    cache it on the request. Returns None if the user has no cart yet,
+    unless ``create`` is set: carts are only created on the first write.
+    """
+    cart = getattr(request, '_cart', _UNRESOLVED)
+    if cart is _UNRESOLVED:
+        cart = Cart.objects.filter(user=request.user).first()
+        request._cart = cart
+    if cart is None and create:
+        cart, _created = Cart.objects.get_or_create(user=request.user)
+        request._cart = cart
+    return cart
+
+
+class CurrentCartDefault:
+    """Serializer default resolving to the requesting user's cart, creating it on first use."""
+    requires_context = True
+
+    def __call__(self, serializer_field):
+        return get_request_cart(serializer_field.context['request'], create=True)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}()'
+
+
+def apply_bulk_operations(cart, operations):
+    """
+    Apply [{service_id, quantity, op}] to ``cart`` in order and write the
+    net result with one upsert and one delete. ``op`` is ``add`` (increment),
+    ``set`` or ``remove``; a resulting quantity of 0 removes the line.
+    Call inside a transaction: the cart row stays locked until it commits.
+    """
+    service_ids = {operation['service_id'] for operation in operations}
+    # lock the cart, not its lines: a line that doesn't exist yet can't be locked, so two
+    # concurrent adds of a new service would both start from 0 (same lock as checkout)
+    Cart.objects.select_for_update().only('id').get(pk=cart.pk)
+    quantities = dict(CartItem.objects
+                      .filter(cart=cart, service_id__in=service_ids)
+                      .values_list('service_id', 'quantity'))
+    for operation in operations:
+        service_id = operation['service_id']
+        if operation['op'] == 'add':
+            quantities[service_id] = quantities.get(service_id, 0) + operation['quantity']
+        elif operation['op'] == 'set':
+            quantities[service_id] = operation['quantity']
+        else:
+            quantities[service_id] = 0
+
+    keep = [CartItem(cart=cart, service_id=service_id, quantity=quantity)
+            for service_id, quantity in quantities.items() if quantity > 0]
+    drop = [service_id for service_id, quantity in quantities.items() if quantity <= 0]
+    if keep:
+        CartItem.objects.bulk_create(keep, update_conflicts=True,
+                                     unique_fields=['cart', 'service'], update_fields=['quantity'])
+    if drop:
+        CartItem.objects.filter(cart=cart, service_id__in=drop).delete()
+
+
+def get_cart_summary(user):
+    """
+    Cart lines with slim service fields, per-line subtotal, cart total and
+    item count, all from one query (subtotals and totals computed in SQL).
+    """
+    subtotal = ExpressionWrapper(F('quantity') * F('service__price'),
+                                 output_field=DecimalField(max_digits=12, decimal_places=2))
+    rows = list(CartItem.objects
+                .filter(cart__user=user)
+                .annotate(subtotal=subtotal,
+                          total=Window(Sum(subtotal)),
+                          item_count=Window(Sum('quantity')))
+                .order_by('id')
+                .values('id', 'cart_id', 'quantity', 'service_id', 'service__title',
+                        'service__price', 'subtotal', 'total', 'item_count'))
+    return {
+        'id': rows[0]['cart_id'] if rows else None,
+        'items': [{
+            'id': row['id'],
+            'service': {'id': row['service_id'], 'title': row['service__title'], 'price': row['service__price']},
+            'quantity': row['quantity'],
+            'subtotal': row['subtotal'],
+        } for row in rows],
+        'item_count': rows[0]['item_count'] if rows else 0,
+        'total': rows[0]['total'] if rows else Decimal('0.00'),
+    }
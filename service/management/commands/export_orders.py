@@ -0,0 +1,49 @@
+import resource
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from service import exports
+
+
+class Command(BaseCommand):
+    help = "Stream orders and their items as CSV or JSONL (one row per item) to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help="Output file; stdout by default.")
+        parser.add_argument('--output-format', choices=exports.FORMATS, default='csv')
+        parser.add_argument('--created-from', help="YYYY-MM-DD, inclusive.")
+        parser.add_argument('--created-to', help="YYYY-MM-DD, inclusive.")
+        parser.add_argument('--status', help="Comma separated order statuses.")
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+        parser.add_argument('--stats', action='store_true', help="Print rows, rows/sec and peak RSS to stderr.")
+
+    def handle(self, *args, **options):
+        filters, errors = exports.parse_filters(options)
+        if errors:
+            raise CommandError('; '.join(f"{name}: {message}" for name, message in errors.items()))
+
+        rows = 0
+
+        def counted(source):
+            nonlocal rows
+            for row in source:
+                rows += 1
+                yield row
+
+        started = time.perf_counter()
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            source = counted(exports.export_rows(filters, chunk_size=options['chunk_size']))
+            for chunk in exports.render(source, options['output_format']):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if options['stats']:
+            seconds = time.perf_counter() - started
+            # ru_maxrss is in KiB on Linux
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            self.stderr.write(f"{rows} rows in {seconds:.2f}s ({rows / seconds:.0f} rows/s), peak RSS {peak:.1f} MiB")
@@ -0,0 +1,80 @@
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from service.payments import SESSION_PATH, VALIDATION_PATH
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real gateway
+    latency = 0.0
+    fail_rate = 0.0
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _should_fail(self):
+        return random.random() < self.fail_rate
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        time.sleep(self.latency)
+        if urlparse(self.path).path != SESSION_PATH:
+            return self._send(404, {'status': 'FAILED', 'failedreason': 'Unknown endpoint'})
+        if self._should_fail():
+            return self._send(200, {'status': 'FAILED', 'failedreason': 'Simulated failure'})
+        session = uuid.uuid4().hex
+        self._send(200, {
+            'status': 'SUCCESS',
+            'sessionkey': session,
+            'tran_id': form.get('tran_id'),
+            'GatewayPageURL': f"http://{self.headers.get('Host')}/pay/{session}",
+        })
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        time.sleep(self.latency)
+        if url.path != VALIDATION_PATH:
+            return self._send(404, {'status': 'FAILED', 'failedreason': 'Unknown endpoint'})
+        val_id = parse_qs(url.query).get('val_id', [''])[0]
+        status = 'INVALID_TRANSACTION' if self._should_fail() else 'VALID'
+        self._send(200, {'status': status, 'val_id': val_id, 'tran_id': val_id.removeprefix('val_')})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = ("Run a local SSLCOMMERZ stand-in (session + validation APIs) for offline testing. "
+            "Point SSLCOMMERZ_BASE_URL at it.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=0, help="Delay added to every response")
+        parser.add_argument('--fail-rate', type=float, default=0, help="Fraction of calls answered as failed")
+
+    def handle(self, *args, **options):
+        handler = type('Handler', (FakeGatewayHandler,), {
+            'latency': options['latency_ms'] / 1000,
+            'fail_rate': options['fail_rate'],
+        })
+        server = ThreadingHTTPServer((options['host'], options['port']), handler)
+        self.stdout.write(f"Fake gateway on http://{options['host']}:{options['port']}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
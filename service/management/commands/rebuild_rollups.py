@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from service.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily sales/review/order-status rollups from orders and reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        service_rows, order_rows = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {service_rows} service/day rows and {order_rows} day/status rows"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from service import cache
+from service.ratings import recompute_all
+
+
+class Command(BaseCommand):
+    help = "Recompute Service.average_rating / rating_count from reviews (backfill and drift repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = recompute_all(batch_size=options['batch_size'])
+            transaction.on_commit(cache.bump_version)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed ratings for {updated} services"))
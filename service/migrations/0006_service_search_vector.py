@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:19
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # GIN index + backfill only exist on PostgreSQL; other backends use the icontains fallback
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "UPDATE service_service SET search_vector = "
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS service_service_search_vector_gin ON service_service USING gin (search_vector)"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS service_service_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0005_remove_cartitem_uniq_cart_service_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
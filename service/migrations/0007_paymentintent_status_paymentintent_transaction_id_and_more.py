@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0006_service_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentintent',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('SUCCESS', 'Success'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], default='PENDING', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='paymentintent',
+            name='transaction_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='paymentintent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
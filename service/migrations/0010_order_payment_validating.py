@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='payment_status',
+            field=models.CharField(choices=[('UNPAID', 'unpaid'), ('VALIDATING', 'pending validation'), ('PAID', 'paid'), ('REFUNDED', 'refunded'), ('FAILED', 'failed')], default='UNPAID', max_length=32),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from users.models import User
 from decimal import Decimal
 # Create your models here.
@@ -9,6 +10,15 @@ class Service(models.Model):
     duration_minutes = models.PositiveIntegerField(null=True, blank=True)
     average_rating = models.FloatField(default=0.0)
     rating_count = models.PositiveIntegerField(default=0)
+    # maintained by api.search (GIN indexed on PostgreSQL)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        # keyset pagination orders by (sort field, id); see api.pagination
+        indexes = [
+            models.Index(fields=['-average_rating', '-id'], name='service_rating_id_idx'),
+            models.Index(fields=['price', 'id'], name='service_price_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -24,6 +34,8 @@ class Review(models.Model):
 
     class Meta:
         unique_together = ('service', 'user', 'order')
+        # ReviewViewSet and the service overview list a service's reviews newest id first
+        indexes = [models.Index(fields=['service', '-id'], name='review_service_id_idx')]
 
 class Cart(models.Model):
     user = models.OneToOneField(User, related_name='cart', on_delete=models.CASCADE)
@@ -58,12 +70,18 @@ class Order(models.Model):
 
     PAYMENT_STATUS = (                              # optional but recommended
         ('UNPAID', 'unpaid'),
+        # success callback received, waiting for the gateway validation job (service.callbacks)
+        ('VALIDATING', 'pending validation'),
         ('PAID', 'paid'),
         ('REFUNDED', 'refunded'),
         ('FAILED', 'failed'),
     )
     payment_status = models.CharField(max_length=32, default='UNPAID', choices=PAYMENT_STATUS)
 
+    class Meta:
+        # OrderViewSet: the user's orders, newest first
+        indexes = [models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx')]
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     service_title = models.CharField(max_length=200)
@@ -74,7 +92,44 @@ class OrderItem(models.Model):
 
 
 class PaymentIntent(models.Model):
+    STATUS = (
+        ('PENDING', 'Pending'),
+        ('SUCCESS', 'Success'),
+        ('FAILED', 'Failed'),
+        ('CANCELLED', 'Cancelled'),
+    )
+
     order = models.OneToOneField(Order, related_name='paymnet_intent', on_delete=models.CASCADE)
     provider = models.CharField(max_length=100, blank=True)
+    # gateway tran_id; callbacks are deduplicated on it
+    transaction_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default='PENDING')
     provider_payload = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+# Daily rollups maintained by service.rollups (rebuild with manage.py rebuild_rollups)
+
+class ServiceDailyStats(models.Model):
+    service = models.ForeignKey(Service, related_name='daily_stats', on_delete=models.CASCADE)
+    day = models.DateField()
+    # items of orders in a sold status (CONFIRMED, IN_PROGRESS, COMPLETED), by order date
+    quantity_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    # reviews by review date
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('service', 'day')
+        indexes = [models.Index(fields=['day'], name='service_dailystats_day_idx')]
+
+
+class OrderDailyStats(models.Model):
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.ORDER_STATUS)
+    orders = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        unique_together = ('day', 'status')
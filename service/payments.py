@@ -0,0 +1,95 @@
+"""
+SSLCOMMERZ gateway client.
+
+One process-wide client keeps a keep-alive connection pool to the gateway
+(no new TCP/TLS handshake per payment) and applies connect/read timeouts,
+so a slow gateway can't hold a worker forever. ``acreate_session`` runs the
+same call off the event loop for the ASGI entry point.
+"""
+from functools import lru_cache
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SESSION_PATH = '/gwprocess/v4/api.php'
+VALIDATION_PATH = '/validator/api/validationserverAPI.php'
+
+
+class SSLCommerzGateway:
+    def __init__(self, store_id, store_pass, sandbox=True, base_url='', timeout=15.0,
+                 connect_timeout=3.05, pool_size=10):
+        self.store_id = store_id
+        self.store_pass = store_pass
+        self.base_url = (base_url or f"https://{'sandbox' if sandbox else 'securepay'}.sslcommerz.com").rstrip('/')
+        self.timeout = (connect_timeout, timeout)
+
+        self.session = requests.Session()
+        # only idempotent GETs (validation) are retried; a POST could open two sessions
+        retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _call(self, method, path, **kwargs):
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as exc:
+            # same shape as a gateway-side failure so callers have one error path
+            return {'status': 'FAILED', 'failedreason': str(exc)}
+
+    def create_session(self, post_body):
+        payload = dict(post_body, store_id=self.store_id, store_passwd=self.store_pass)
+        return self._call('POST', SESSION_PATH, data=payload)
+
+    def validate(self, val_id):
+        params = {'val_id': val_id, 'store_id': self.store_id, 'store_passwd': self.store_pass, 'format': 'json'}
+        return self._call('GET', VALIDATION_PATH, params=params)
+
+    async def acreate_session(self, post_body):
+        # requests is blocking; run it on the thread pool, not the event loop
+        return await sync_to_async(self.create_session, thread_sensitive=False)(post_body)
+
+    async def avalidate(self, val_id):
+        return await sync_to_async(self.validate, thread_sensitive=False)(val_id)
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    conf = settings.SSLCOMMERZ
+    return SSLCommerzGateway(
+        store_id=conf['STORE_ID'],
+        store_pass=conf['STORE_PASS'],
+        sandbox=conf.get('SANDBOX', True),
+        base_url=conf.get('BASE_URL', ''),
+        timeout=conf.get('TIMEOUT', 15.0),
+        pool_size=conf.get('POOL_SIZE', 10),
+    )
+
+
+def build_session_payload(user, order_id, num_items=1, amount=100):
+    return {
+        'total_amount': amount,
+        'currency': "BDT",
+        'tran_id': f"txn_{order_id}",
+        'success_url': f"{settings.BACKEND_URL}/api/v1/payment/success/",
+        'fail_url': f"{settings.BACKEND_URL}/api/v1/payment/fail/",
+        'cancel_url': f"{settings.BACKEND_URL}/api/v1/payment/cancel/",
+        'emi_option': 0,
+        'cus_name': f"{user.first_name} {user.last_name}",
+        'cus_email': user.email,
+        'cus_phone': user.phone_number,
+        'cus_add1': user.address,
+        'cus_city': "Dhaka",
+        'cus_country': "Bangladesh",
+        'shipping_method': "Courier",
+        'multi_card_name': "",
+        'num_of_item': num_items,
+        'product_name': "E-commerce Products",
+        'product_category': "General",
+        'product_profile': "general",
+    }
@@ -0,0 +1,98 @@
+"""
+Keeps Service.average_rating / rating_count in step with Review rows.
+
+Every change is a single ``UPDATE service_service SET ... = F(...)`` so
+concurrent reviews of the same service serialize on the row lock instead
+of racing on a read-modify-write. Call these inside the same transaction
+as the review write; ``recompute_ratings`` repairs any drift.
+"""
+from django.db.models import Avg, Case, Count, ExpressionWrapper, F, FloatField, Value, When
+
+from .models import Review, Service
+
+
+def _float(expression):
+    return ExpressionWrapper(expression, output_field=FloatField())
+
+
+def add_rating(service_id, rating):
+    return Service.objects.filter(pk=service_id).update(
+        average_rating=_float((F('average_rating') * F('rating_count') + rating) / (F('rating_count') + 1.0)),
+        rating_count=F('rating_count') + 1,
+    )
+
+
+def remove_rating(service_id, rating):
+    return Service.objects.filter(pk=service_id).update(
+        average_rating=Case(
+            When(rating_count__lte=1, then=Value(0.0)),
+            default=_float((F('average_rating') * F('rating_count') - rating) / (F('rating_count') - 1.0)),
+            output_field=FloatField(),
+        ),
+        rating_count=Case(
+            When(rating_count__lte=1, then=Value(0)),
+            default=F('rating_count') - 1,
+        ),
+    )
+
+
+def change_rating(service_id, old_rating, new_rating):
+    if old_rating == new_rating:
+        return 0
+    return Service.objects.filter(pk=service_id, rating_count__gt=0).update(
+        # float(): integer / integer truncates on PostgreSQL and SQLite
+        average_rating=_float(F('average_rating') + float(new_rating - old_rating) / F('rating_count')),
+    )
+
+
+def review_saved(review, old_service_id=None, old_rating=None):
+    """Apply a created (old_* is None) or updated review to the aggregates."""
+    if old_service_id is None:
+        add_rating(review.service_id, review.rating)
+    elif old_service_id != review.service_id:
+        remove_rating(old_service_id, old_rating)
+        add_rating(review.service_id, review.rating)
+    else:
+        change_rating(review.service_id, old_rating, review.rating)
+
+
+def review_deleted(review):
+    remove_rating(review.service_id, review.rating)
+
+
+def recompute_all(batch_size=1000):
+    """
+    Rebuild every service's aggregates from one grouped query over Review.
+    Returns the number of services that have reviews.
+    """
+    totals = (Review.objects
+              .order_by()
+              .values('service_id')
+              .annotate(avg=Avg('rating'), n=Count('id')))
+
+    batch = []
+    updated = 0
+    for row in totals.iterator(chunk_size=batch_size):
+        batch.append(Service(pk=row['service_id'], average_rating=row['avg'] or 0.0, rating_count=row['n']))
+        if len(batch) >= batch_size:
+            updated += Service.objects.bulk_update(batch, ['average_rating', 'rating_count'])
+            batch = []
+    if batch:
+        updated += Service.objects.bulk_update(batch, ['average_rating', 'rating_count'])
+
+    # services whose last review was deleted
+    (Service.objects
+     .exclude(pk__in=Review.objects.values('service_id'))
+     .exclude(rating_count=0, average_rating=0.0)
+     .update(average_rating=0.0, rating_count=0))
+    return updated
+
+
+def histogram(service_id):
+    """{1: n, ..., 5: n} review counts for a service, from one grouped query."""
+    counts = dict(Review.objects
+                  .filter(service_id=service_id)
+                  .order_by()
+                  .values_list('rating')
+                  .annotate(n=Count('id')))
+    return {stars: counts.get(stars, 0) for stars in range(1, 6)}
@@ -0,0 +1,219 @@
+"""
+Daily sales / review / order-status rollups behind the staff analytics endpoint.
+
+ServiceDailyStats holds, per service and day, what was sold (items of
+orders in a SOLD_STATUSES status, dated by the order) and the reviews
+written that day; OrderDailyStats counts orders per creation day and
+current status. Both are kept up to date incrementally from the code paths
+that create orders, move their status or write reviews (call these inside
+the same transaction). ``manage.py rebuild_rollups`` recomputes them from
+scratch; run it after deploying the tables and to repair drift from
+changes made outside those paths (admin edits, raw SQL).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import Greatest, TruncDate
+from django.utils import timezone
+
+from .models import Order, OrderDailyStats, OrderItem, Review, ServiceDailyStats
+
+SOLD_STATUSES = ('CONFIRMED', 'IN_PROGRESS', 'COMPLETED')
+
+
+def _day(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _increment(model, keys, **deltas):
+    """Add ``deltas`` to the counters of the row at ``keys``, creating it if needed. Never goes below 0."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    changes = {name: F(name) + delta if delta > 0
+               else Greatest(F(name) + delta, 0, output_field=model._meta.get_field(name))
+               for name, delta in deltas.items()}
+    if model.objects.filter(**keys).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **{name: max(delta, 0) for name, delta in deltas.items()})
+    except IntegrityError:
+        # created concurrently between our UPDATE and INSERT
+        model.objects.filter(**keys).update(**changes)
+
+
+def _increment_many(model, keys, by, deltas):
+    """
+    ``_increment`` for the rows at ``keys`` plus ``by=<key>`` for every key of
+    ``deltas`` ({key: {counter: delta}}), in at most two queries however many rows.
+    """
+    if not deltas:
+        return
+    if any(delta > 0 for counters in deltas.values() for delta in counters.values()):
+        # missing rows start at 0; rows that exist are left alone
+        model.objects.bulk_create([model(**keys, **{by: key}) for key in sorted(deltas)], ignore_conflicts=True)
+    changes = {}
+    for name in {name for counters in deltas.values() for name in counters}:
+        field = model._meta.get_field(name)
+        delta = Case(*[When(**{by: key}, then=Value(counters.get(name, 0))) for key, counters in deltas.items()],
+                     default=Value(0), output_field=field)
+        changes[name] = Greatest(F(name) + delta, 0, output_field=field)
+    model.objects.filter(**keys, **{f'{by}__in': list(deltas)}).update(**changes)
+
+
+def _apply_sales(order, items, sign):
+    # one row per service on the order's day, all updated at once
+    sales = defaultdict(lambda: {'quantity_sold': 0, 'revenue': Decimal('0.00')})
+    for item in items:
+        if item.service_id is None:
+            continue
+        sales[item.service_id]['quantity_sold'] += sign * item.quantity
+        sales[item.service_id]['revenue'] += sign * item.subtotal
+    _increment_many(ServiceDailyStats, {'day': _day(order.created_at)}, 'service_id', sales)
+
+
+def order_created(order, items):
+    _increment(OrderDailyStats, {'day': _day(order.created_at), 'status': order.status},
+               orders=1, total_amount=order.total_amount)
+    if order.status in SOLD_STATUSES:
+        _apply_sales(order, items, 1)
+
+
+def order_status_changed(order, old_status, new_status, items=None):
+    """``order`` needs created_at and total_amount; items are loaded if not given."""
+    if old_status == new_status:
+        return
+    day = _day(order.created_at)
+    _increment(OrderDailyStats, {'day': day, 'status': old_status}, orders=-1, total_amount=-order.total_amount)
+    _increment(OrderDailyStats, {'day': day, 'status': new_status}, orders=1, total_amount=order.total_amount)
+
+    was_sold, is_sold = old_status in SOLD_STATUSES, new_status in SOLD_STATUSES
+    if was_sold != is_sold:
+        if items is None:
+            items = list(OrderItem.objects.filter(order_id=order.pk).only('service_id', 'quantity', 'subtotal'))
+        _apply_sales(order, items, 1 if is_sold else -1)
+
+
+def order_deleted(order, items):
+    _increment(OrderDailyStats, {'day': _day(order.created_at), 'status': order.status},
+               orders=-1, total_amount=-order.total_amount)
+    if order.status in SOLD_STATUSES:
+        _apply_sales(order, items, -1)
+
+
+def review_saved(review, old_service_id=None, old_rating=None):
+    """Same contract as ratings.review_saved."""
+    day = _day(review.created_at)
+    if old_service_id is None:
+        _increment(ServiceDailyStats, {'service_id': review.service_id, 'day': day},
+                   review_count=1, rating_sum=review.rating)
+    elif old_service_id != review.service_id:
+        _increment(ServiceDailyStats, {'service_id': old_service_id, 'day': day},
+                   review_count=-1, rating_sum=-old_rating)
+        _increment(ServiceDailyStats, {'service_id': review.service_id, 'day': day},
+                   review_count=1, rating_sum=review.rating)
+    else:
+        _increment(ServiceDailyStats, {'service_id': review.service_id, 'day': day},
+                   rating_sum=review.rating - old_rating)
+
+
+def review_deleted(review):
+    _increment(ServiceDailyStats, {'service_id': review.service_id, 'day': _day(review.created_at)},
+               review_count=-1, rating_sum=-review.rating)
+
+
+def rebuild(batch_size=1000):
+    """Recompute both rollup tables from orders and reviews. Returns (service rows, order rows)."""
+    stats = defaultdict(lambda: {'quantity_sold': 0, 'revenue': Decimal('0.00'), 'review_count': 0, 'rating_sum': 0})
+    sales = (OrderItem.objects
+             .filter(order__status__in=SOLD_STATUSES, service__isnull=False)
+             .annotate(day=TruncDate('order__created_at'))
+             .order_by()
+             .values('service_id', 'day')
+             .annotate(quantity_sold=Sum('quantity'), revenue=Sum('subtotal')))
+    for row in sales.iterator():
+        stats[row['service_id'], row['day']].update(quantity_sold=row['quantity_sold'], revenue=row['revenue'])
+    reviews = (Review.objects
+               .annotate(day=TruncDate('created_at'))
+               .order_by()
+               .values('service_id', 'day')
+               .annotate(review_count=Count('id'), rating_sum=Sum('rating')))
+    for row in reviews.iterator():
+        stats[row['service_id'], row['day']].update(review_count=row['review_count'], rating_sum=row['rating_sum'])
+
+    orders = (Order.objects
+              .annotate(day=TruncDate('created_at'))
+              .order_by()
+              .values('day', 'status')
+              .annotate(orders=Count('id'), total_amount=Sum('total_amount')))
+
+    with transaction.atomic():
+        ServiceDailyStats.objects.all().delete()
+        OrderDailyStats.objects.all().delete()
+        ServiceDailyStats.objects.bulk_create(
+            (ServiceDailyStats(service_id=service_id, day=day, **values) for (service_id, day), values in stats.items()),
+            batch_size=batch_size,
+        )
+        order_rows = OrderDailyStats.objects.bulk_create((OrderDailyStats(**row) for row in orders),
+                                                         batch_size=batch_size)
+    return len(stats), len(order_rows)
+
+
+def dashboard(date_from, date_to, top=10):
+    """
+    Staff dashboard for ``date_from``..``date_to`` (inclusive), read only from
+    the rollup tables: cost depends on the number of days and services, not orders.
+    """
+    days = {}
+    sales = (ServiceDailyStats.objects
+             .filter(day__range=(date_from, date_to))
+             .values('day')
+             .annotate(quantity_sold=Sum('quantity_sold'), revenue=Sum('revenue'),
+                       review_count=Sum('review_count'), rating_sum=Sum('rating_sum'))
+             .order_by('day'))
+    for row in sales:
+        days[row['day']] = dict(row, orders={})
+    statuses = (OrderDailyStats.objects
+                .filter(day__range=(date_from, date_to), orders__gt=0)
+                .values_list('day', 'status', 'orders'))
+    for day, status, count in statuses:
+        days.setdefault(day, {'day': day, 'quantity_sold': 0, 'revenue': Decimal('0.00'),
+                              'review_count': 0, 'rating_sum': 0, 'orders': {}})['orders'][status] = count
+
+    top_services = (ServiceDailyStats.objects
+                    .filter(day__range=(date_from, date_to))
+                    .values('service_id', 'service__title')
+                    .annotate(quantity_sold=Sum('quantity_sold'), revenue=Sum('revenue'),
+                              review_count=Sum('review_count'), rating_sum=Sum('rating_sum'))
+                    .order_by('-revenue', '-quantity_sold', 'service_id')[:top])
+
+    daily = [days[day] for day in sorted(days)]
+    totals = {
+        'quantity_sold': sum(row['quantity_sold'] for row in daily),
+        'revenue': sum((row['revenue'] for row in daily), Decimal('0.00')),
+        'review_count': sum(row['review_count'] for row in daily),
+        'rating_sum': sum(row['rating_sum'] for row in daily),
+        'orders': {},
+    }
+    for row in daily:
+        for status, count in row['orders'].items():
+            totals['orders'][status] = totals['orders'].get(status, 0) + count
+    return {
+        'from': date_from,
+        'to': date_to,
+        'totals': _with_average(totals),
+        'daily': [_with_average(row) for row in daily],
+        'top_services': [_with_average({'service_id': row['service_id'], 'title': row['service__title'],
+                                        **{key: row[key] for key in ('quantity_sold', 'revenue', 'review_count',
+                                                                     'rating_sum')}})
+                         for row in top_services],
+    }
+
+
+def _with_average(row):
+    row['average_rating'] = round(row['rating_sum'] / row['review_count'], 2) if row['review_count'] else None
+    del row['rating_sum']
+    return row
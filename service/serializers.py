@@ -1,12 +1,14 @@
 from rest_framework import serializers
+from api.metrics import TimedSerializerMixin
 from .models import Service, CartItem, Cart, Order, OrderItem, Review
+from .cart import CurrentCartDefault
 from rest_framework import serializers
 from .models import Cart
-class ServiceSerializer(serializers.ModelSerializer):
+class ServiceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Service
-        fields = '__all__'
-class CartSerializer(serializers.ModelSerializer):
+        exclude = ('search_vector',)
+class CartSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Cart
         fields = ['id', 'user', 'created_at']  # adjust as needed
@@ -17,31 +19,76 @@ class CartSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         return Cart.objects.get_or_create(user=request.user)[0]
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartSummaryServiceSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+class CartSummaryItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    service = CartSummaryServiceSerializer()
+    quantity = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+class CartSummarySerializer(TimedSerializerMixin, serializers.Serializer):
+    """Read-only cart view built from service.cart.get_cart_summary."""
+    id = serializers.IntegerField(allow_null=True)
+    items = CartSummaryItemSerializer(many=True)
+    item_count = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+class CartItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     service = ServiceSerializer(read_only=True)
     service_id = serializers.PrimaryKeyRelatedField(write_only=True, queryset=Service.objects.all(), source='service')
-    cart_id = serializers.PrimaryKeyRelatedField(write_only=True, queryset=Cart.objects.all(), source='cart')
+    # always the requesting user's cart (created on the first add), never client input
+    cart_id = serializers.HiddenField(default=CurrentCartDefault(), source='cart')
 
     class Meta:
         model = CartItem
         fields = ('id','service','service_id','cart_id','quantity','added_at')
 
+class CartBulkOperationListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        # one IN query for the whole batch instead of a lookup per line
+        service_ids = {item['service_id'] for item in attrs}
+        found = set(Service.objects.filter(pk__in=service_ids).values_list('pk', flat=True))
+        missing = sorted(service_ids - found)
+        if missing:
+            raise serializers.ValidationError({'service_id': f"Unknown service ids: {missing}"})
+        return attrs
+
+class CartBulkOperationSerializer(serializers.Serializer):
+    service_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, default=1)
+    op = serializers.ChoiceField(choices=('add', 'set', 'remove'), default='add')
+
+    class Meta:
+        list_serializer_class = CartBulkOperationListSerializer
+
 class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ('service_title','unit_price','quantity','subtotal')
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = Order
         fields = ('id','user','status','created_at','total_amount','payment_status','items')
-        read_only_fields = ('user','created_at','total_amount')
+        # checkout opens PENDING/UNPAID; payment callbacks and staff move it on from there
+        read_only_fields = ('user','status','created_at','total_amount','payment_status')
+
+
+class StaffOrderSerializer(OrderSerializer):
+    class Meta(OrderSerializer.Meta):
+        read_only_fields = ('user','created_at','total_amount','payment_status')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
-    user = serializers.ReadOnlyField(source='user.username')
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # User has no username; show the reviewer's name, never their email
+    user = serializers.ReadOnlyField(source='user.get_full_name')
+    rating = serializers.IntegerField(min_value=1, max_value=5)
     class Meta:
         model = Review
         fields = ('id','service','user','order','rating','comment','created_at')
\ No newline at end of file
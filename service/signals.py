@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import Review, Service
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_catalog(sender, raw=False, **kwargs):
+    if raw:
+        return
+    # bump after commit so a concurrent reader can't re-cache the old rows under the new version
+    transaction.on_commit(cache.bump_version)
@@ -0,0 +1,8 @@
+from jobs.queue import task
+
+from . import callbacks
+
+
+@task('payments.validate', max_attempts=5)
+def validate_payment(intent_id, order_id, val_id):
+    callbacks.validate_payment(intent_id, order_id, val_id)
@@ -1,3 +1,494 @@
-from django.test import TestCase
+import threading
+import tracemalloc
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from service import cache, callbacks, exports, payments, ratings, rollups
+from service.cart import apply_bulk_operations
+from service.checkout import CheckoutService
+from service.models import (Cart, CartItem, Order, OrderDailyStats, OrderItem, PaymentIntent, Review, Service,
+                            ServiceDailyStats)
+
+User = get_user_model()
+
+CALLBACK_URL = '/api/v1/payment/success/'
+
+
+def run_in_parallel(*funcs):
+    """Run each callable in its own thread (and connection), released together; re-raise the first error."""
+    barrier = threading.Barrier(len(funcs))
+    errors = []
+
+    def target(func):
+        try:
+            barrier.wait()
+            func()
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=target, args=(func,)) for func in funcs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+class PaymentCallbackTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='pass1234')
+        self.order = Order.objects.create(user=self.user)
+        self.tran_id = f"txn_{self.order.pk}"
+
+    def post_success(self, **data):
+        return self.client.post(CALLBACK_URL, {'tran_id': self.tran_id, **data}, HTTP_HOST='127.0.0.1')
+
+    def validate(self, result):
+        job = Job.objects.get(name='payments.validate')
+        with mock.patch('service.payments.get_gateway') as get_gateway:
+            get_gateway.return_value.validate.return_value = result
+            callbacks.validate_payment(**job.payload)
+        self.order.refresh_from_db()
+
+    def test_success_without_val_id_is_ignored(self):
+        self.post_success(status='VALID')
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.payment_status), ('PENDING', 'UNPAID'))
+        self.assertFalse(PaymentIntent.objects.exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_success_callback_only_marks_validating(self):
+        self.post_success(val_id='val_1', status='VALID')
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.payment_status), ('PENDING', 'VALIDATING'))
+        self.assertEqual(Job.objects.filter(name='payments.validate').count(), 1)
+
+    def test_valid_validation_confirms_order(self):
+        self.post_success(val_id='val_1')
+        self.validate({'status': 'VALID', 'tran_id': self.tran_id})
+        self.assertEqual((self.order.status, self.order.payment_status), ('CONFIRMED', 'PAID'))
+
+    def test_invalid_validation_fails_payment(self):
+        self.post_success(val_id='forged')
+        self.validate({'status': 'INVALID_TRANSACTION'})
+        self.assertEqual((self.order.status, self.order.payment_status), ('PENDING', 'FAILED'))
+
+    def test_validation_for_another_transaction_is_rejected(self):
+        self.post_success(val_id='val_other')
+        self.validate({'status': 'VALID', 'tran_id': 'txn_999999'})
+        self.assertEqual(self.order.payment_status, 'FAILED')
+
+    def test_new_val_id_after_forged_callback_is_validated(self):
+        self.post_success(val_id='forged')
+        self.post_success(val_id='val_real')
+        self.assertEqual(Job.objects.filter(name='payments.validate').count(), 2)
+        # retry of the same callback
+        self.post_success(val_id='val_real')
+        self.assertEqual(Job.objects.filter(name='payments.validate').count(), 2)
+
+
+    def test_repeated_and_late_callbacks_are_ignored(self):
+        self.post_success(val_id='val_1')
+        self.post_success(val_id='val_1')
+        # a success is final: a fail callback arriving after it changes nothing
+        self.client.post('/api/v1/payment/fail/', {'tran_id': self.tran_id}, HTTP_HOST='127.0.0.1')
+        self.assertEqual(Job.objects.filter(name='payments.validate').count(), 1)
+        self.assertEqual(PaymentIntent.objects.get().status, callbacks.SUCCESS)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, 'VALIDATING')
+
+
+@override_settings(SSLCOMMERZ=dict(settings.SSLCOMMERZ, BASE_URL='http://gateway.test', TIMEOUT=2.0, POOL_SIZE=4))
+class PaymentGatewayTests(TestCase):
+    def setUp(self):
+        payments.get_gateway.cache_clear()
+        self.addCleanup(payments.get_gateway.cache_clear)
+
+    def test_one_pooled_client_per_process(self):
+        gateway = payments.get_gateway()
+        self.assertIs(payments.get_gateway(), gateway)
+        self.assertEqual(gateway.session.get_adapter('http://gateway.test')._pool_maxsize, 4)
+
+    def test_transport_errors_look_like_gateway_failures(self):
+        gateway = payments.get_gateway()
+        with mock.patch.object(gateway.session, 'request', side_effect=requests.ConnectTimeout('slow')) as request:
+            result = gateway.create_session({'tran_id': 'txn_1'})
+        self.assertEqual(result['status'], 'FAILED')
+        self.assertEqual(request.call_args.kwargs['timeout'], (3.05, 2.0))
+        self.assertEqual(request.call_args.args, ('POST', 'http://gateway.test/gwprocess/v4/api.php'))
+
+
+def write_review(service, user, rating):
+    # what ReviewViewSet.perform_create does
+    with transaction.atomic():
+        review = Review.objects.create(service=service, user=user, rating=rating)
+        ratings.review_saved(review)
+    return review
+
+
+class RatingTests(TestCase):
+    def setUp(self):
+        self.service = Service.objects.create(title='Cleaning', price=Decimal('10.00'))
+        self.users = [User.objects.create_user(email=f'r{n}@example.com', password='x') for n in range(4)]
+
+    def test_changed_rating_is_not_truncated(self):
+        reviews = [write_review(self.service, user, 3) for user in self.users]
+        old_rating, reviews[0].rating = reviews[0].rating, 5
+        reviews[0].save()
+        ratings.review_saved(reviews[0], old_service_id=self.service.pk, old_rating=old_rating)
+        self.service.refresh_from_db()
+        self.assertEqual(self.service.rating_count, 4)
+        self.assertAlmostEqual(self.service.average_rating, 3.5)
+
+
+class PublicReviewTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.client = APIClient(HTTP_HOST='127.0.0.1')
+        self.user = User.objects.create_user(email='rina@example.com', password='x', first_name='Rina',
+                                             last_name='Akter')
+        self.service, other = (Service.objects.create(title=title, price=Decimal('10.00'))
+                               for title in ('Cleaning', 'Painting'))
+        write_review(self.service, self.user, 5)
+        write_review(other, self.user, 2)
+
+    def test_anyone_can_read_a_services_reviews(self):
+        response = self.client.get('/api/v1/reviews/', {'service': self.service.pk})
+        self.assertEqual(response.status_code, 200)
+        review, = response.data['results']
+        # the reviewer's name, never their email
+        self.assertEqual((review['rating'], review['user']), (5, 'Rina Akter'))
+        self.assertNotIn('rina@example.com', response.content.decode())
+        overview = self.client.get(f'/api/v1/services/{self.service.pk}/overview/')
+        self.assertEqual((overview.status_code, overview.data['rating_histogram'][5]), (200, 1))
+
+    def test_writing_needs_an_account(self):
+        response = self.client.post('/api/v1/reviews/', {'service': self.service.pk, 'rating': 4}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.get('/api/v1/reviews/', {'service': 'cleaning'}).status_code, 400)
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class RatingConcurrencyTests(TransactionTestCase):
+    def test_parallel_reviews_are_both_counted(self):
+        service = Service.objects.create(title='Cleaning', price=Decimal('10.00'))
+        first, second = (User.objects.create_user(email=f'p{n}@example.com', password='x') for n in range(2))
+        run_in_parallel(lambda: write_review(service, first, 2), lambda: write_review(service, second, 5))
+        service.refresh_from_db()
+        self.assertEqual(service.rating_count, 2)
+        self.assertAlmostEqual(service.average_rating, 3.5)
+
+
+def fill_cart(user, lines):
+    cart = Cart.objects.create(user=user)
+    services = [Service.objects.create(title=f'Service {n}', price=Decimal('12.50')) for n in range(lines)]
+    CartItem.objects.bulk_create([CartItem(cart=cart, service=service, quantity=2) for service in services])
+    return cart
+
+
+def rollup_snapshot():
+    # zero rows left behind by the incremental path are absent after a rebuild
+    sales = {(row.service_id, row.day): (row.quantity_sold, row.revenue, row.review_count, row.rating_sum)
+             for row in ServiceDailyStats.objects.all()
+             if (row.quantity_sold, row.revenue, row.review_count, row.rating_sum) != (0, 0, 0, 0)}
+    orders = {(row.day, row.status): (row.orders, row.total_amount)
+              for row in OrderDailyStats.objects.all() if row.orders}
+    return sales, orders
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='x')
+        self.staff = User.objects.create_user(email='staff@example.com', password='x', is_staff=True)
+        self.client = APIClient(HTTP_HOST='127.0.0.1')
+
+    def assertMatchesRebuild(self):
+        incremental = rollup_snapshot()
+        rollups.rebuild()
+        self.assertEqual(rollup_snapshot(), incremental)
+        return incremental
+
+    def test_rollups_follow_create_update_and_destroy(self):
+        fill_cart(self.user, 3)
+        order = CheckoutService(self.user).checkout()
+        sales, orders = self.assertMatchesRebuild()
+        self.assertEqual((sales, list(orders.values())), ({}, [(1, Decimal('75.00'))]))
+
+        self.client.force_authenticate(self.staff)
+        self.client.patch(f'/api/v1/orders/{order.pk}/', {'status': 'CONFIRMED'}, format='json')
+        sales, orders = self.assertMatchesRebuild()
+        self.assertEqual(sorted(sales.values()), [(2, Decimal('25.00'), 0, 0)] * 3)
+        self.assertEqual([status for _day, status in orders], ['CONFIRMED'])
+
+        self.client.force_authenticate(self.user)
+        self.client.delete(f'/api/v1/orders/{order.pk}/')
+        self.assertEqual(self.assertMatchesRebuild(), ({}, {}))
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='x')
+        self.client = APIClient(HTTP_HOST='127.0.0.1')
+        self.client.force_authenticate(self.user)
+
+    def checkout(self):
+        return self.client.post('/api/v1/orders/', {}, format='json')
+
+    def test_checkout_query_count(self):
+        fill_cart(self.user, 2)
+        with self.assertNumQueries(11):
+            response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Decimal(response.data['total_amount']), Decimal('50.00'))
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_checkout_query_count_does_not_grow_with_the_cart(self):
+        fill_cart(self.user, 20)
+        with self.assertNumQueries(11):
+            self.checkout()
+        self.assertEqual(OrderItem.objects.count(), 20)
+
+    def test_checkout_queries_do_not_grow_with_the_cart_in_any_status(self):
+        # the API always opens PENDING; sold statuses also write the sales rollups
+        for status, _label in Order.ORDER_STATUS:
+            counts = []
+            # the first order of a day and status also creates its OrderDailyStats row
+            for lines in (1, 2, 20):
+                user = User.objects.create_user(email=f'{status.lower()}{lines}@example.com', password='x')
+                fill_cart(user, lines)
+                with CaptureQueriesContext(connection) as queries:
+                    CheckoutService(user).checkout(status=status)
+                counts.append(len(queries))
+            with self.subTest(status=status):
+                self.assertEqual(counts[1], counts[2])
+
+    def test_status_change_queries_do_not_grow_with_the_order(self):
+        self.client.force_authenticate(User.objects.create_user(email='staff@example.com', password='x',
+                                                                is_staff=True))
+        counts = []
+        # the first change also creates the day's CONFIRMED row
+        for lines in (1, 2, 20):
+            user = User.objects.create_user(email=f'status{lines}@example.com', password='x')
+            fill_cart(user, lines)
+            order = CheckoutService(user).checkout()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(f'/api/v1/orders/{order.pk}/', {'status': 'CONFIRMED'}, format='json')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[1], counts[2])
+
+    def test_customer_cannot_mark_an_order_paid(self):
+        fill_cart(self.user, 1)
+        paid = {'status': 'COMPLETED', 'payment_status': 'PAID'}
+        response = self.client.post('/api/v1/orders/', paid, format='json')
+        self.assertEqual((response.data['status'], response.data['payment_status']), ('PENDING', 'UNPAID'))
+        self.client.patch(f"/api/v1/orders/{response.data['id']}/", paid, format='json')
+        order = Order.objects.get()
+        self.assertEqual((order.status, order.payment_status), ('PENDING', 'UNPAID'))
+
+    def test_staff_can_move_the_status_only(self):
+        fill_cart(self.user, 1)
+        order = CheckoutService(self.user).checkout()
+        staff = User.objects.create_user(email='staff@example.com', password='x', is_staff=True)
+        self.client.force_authenticate(staff)
+        response = self.client.patch(f'/api/v1/orders/{order.pk}/', {'status': 'IN_PROGRESS', 'payment_status': 'PAID'},
+                                     format='json')
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.payment_status), ('IN_PROGRESS', 'UNPAID'))
+
+    def test_empty_cart_is_rejected(self):
+        self.assertEqual(self.checkout().status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_cart_summary_query_count(self):
+        fill_cart(self.user, 3)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/cart/', {'view': 'summary'})
+        self.assertEqual(response.data['item_count'], 6)
+
+    def test_cart_summary_lines_and_revalidation(self):
+        cart = fill_cart(self.user, 2)
+        response = self.client.get('/api/v1/cart/', {'view': 'summary'})
+        self.assertEqual(response.data['id'], cart.pk)
+        self.assertEqual((response.data['item_count'], Decimal(response.data['total'])), (4, Decimal('50.00')))
+        line = response.data['items'][0]
+        self.assertEqual(set(line['service']), {'id', 'title', 'price'})
+        self.assertEqual(Decimal(line['subtotal']), Decimal('25.00'))
+
+        etag = response['ETag']
+        response = self.client.get('/api/v1/cart/', {'view': 'summary'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # the summary and the plain cart are different representations
+        self.assertNotEqual(self.client.get('/api/v1/cart/')['ETag'], etag)
+        CartItem.objects.filter(cart=cart).first().delete()
+        response = self.client.get('/api/v1/cart/', {'view': 'summary'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['item_count']), (200, 2))
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class CheckoutConcurrencyTests(TransactionTestCase):
+    def test_parallel_checkouts_order_the_cart_once(self):
+        user = User.objects.create_user(email='buyer@example.com', password='x')
+        fill_cart(user, 2)
+        results = []
+
+        def checkout():
+            try:
+                results.append(CheckoutService(user).checkout())
+            except Exception as exc:
+                results.append(exc)
+
+        run_in_parallel(*[checkout] * 4)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(OrderItem.objects.count(), 2)
+        self.assertEqual(sum(isinstance(result, Order) for result in results), 1)
+
+
+@skipUnlessDBFeature('test_db_allows_multiple_connections')
+class CartConcurrencyTests(TransactionTestCase):
+    def test_parallel_adds_of_a_new_line_all_count(self):
+        user = User.objects.create_user(email='buyer@example.com', password='x')
+        cart = Cart.objects.create(user=user)
+        service = Service.objects.create(title='Cleaning', price=Decimal('10.00'))
+
+        def add():
+            # what CartItemViewSet.bulk does
+            with transaction.atomic():
+                apply_bulk_operations(cart, [{'service_id': service.pk, 'quantity': 2, 'op': 'add'}])
+
+        run_in_parallel(*[add] * 4)
+        self.assertEqual(CartItem.objects.get(cart=cart, service=service).quantity, 8)
+
+
+class ReadQueryCountTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(email='reader@example.com', password='x')
+        self.client = APIClient(HTTP_HOST='127.0.0.1')
+        self.client.force_authenticate(self.user)
+
+    def test_order_list(self):
+        for _ in range(3):
+            fill_cart(self.user, 2)
+            CheckoutService(self.user).checkout()
+            Cart.objects.filter(user=self.user).delete()
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/v1/orders/')
+        self.assertEqual(len(response.data['results']), 3)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/orders/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_service_overview(self):
+        service = Service.objects.create(title='Cleaning', price=Decimal('10.00'))
+        write_review(service, self.user, 4)
+        url = f'/api/v1/services/{service.pk}/overview/'
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.data['rating_histogram'][4], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data, response.data)
+
+    def test_cart_reads(self):
+        fill_cart(self.user, 2)
+        with self.assertNumQueries(1):
+            self.client.get('/api/v1/cart/items/')
+        with self.assertNumQueries(2):
+            self.client.get('/api/v1/cart/')
+        with self.assertNumQueries(1):
+            self.client.post('/api/v1/cart/')
+
+    def test_cart_etag_changes_when_quantities_swap(self):
+        cart = fill_cart(self.user, 2)
+        first, second = cart.items.order_by('id')
+        for params in ({}, {'view': 'summary'}):
+            with self.subTest(**params):
+                CartItem.objects.filter(pk=first.pk).update(quantity=1)
+                CartItem.objects.filter(pk=second.pk).update(quantity=3)
+                etag = self.client.get('/api/v1/cart/', params)['ETag']
+                # same lines, same total quantity
+                CartItem.objects.filter(pk=first.pk).update(quantity=3)
+                CartItem.objects.filter(pk=second.pk).update(quantity=1)
+                response = self.client.get('/api/v1/cart/', params, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+
+class CatalogVersionTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_evicted_version_does_not_revive_cached_pages(self):
+        client = APIClient(HTTP_HOST='127.0.0.1')
+        Service.objects.create(title='Cleaning', price=Decimal('10.00'))
+        client.get('/api/v1/services/')
+        seen = {cache.get_version()}
+        cache.bump_version()
+        seen.add(cache.get_version())
+        client.get('/api/v1/services/')
+
+        # the version key goes, the pages cached under it stay
+        cache.get_cache().delete(cache.VERSION_KEY)
+        self.assertNotIn(cache.get_version(), seen)
+        cache.get_cache().delete(cache.VERSION_KEY)
+        cache.bump_version()
+        self.assertNotIn(cache.get_version(), seen)
+
+        Service.objects.filter(title='Cleaning').update(title='Deep cleaning')
+        cache.get_cache().delete(cache.VERSION_KEY)
+        self.assertEqual(client.get('/api/v1/services/').data['results'][0]['title'], 'Deep cleaning')
+
+
+class ExportMemoryTests(TestCase):
+    ORDERS = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email='bulk@example.com', password='x')
+        service = Service.objects.create(title='Cleaning', price=Decimal('10.00'))
+        orders = Order.objects.bulk_create([Order(user=user, total_amount=Decimal('20.00'))
+                                            for _ in range(cls.ORDERS)], batch_size=2000)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, service=service, service_title=service.title, unit_price=service.price,
+                      quantity=2, subtotal=Decimal('20.00')) for order in orders
+        ], batch_size=2000)
+
+    def test_peak_memory_stays_flat(self):
+        for fmt in exports.FORMATS:
+            with self.subTest(fmt=fmt):
+                tracemalloc.start()
+                try:
+                    size = sum(len(chunk) for chunk in exports.render(exports.export_rows({}, chunk_size=500), fmt))
+                    _current, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+                # megabytes streamed, one chunk of rows held at a time (a loaded
+                # queryset of these rows alone would be well over 10 MB)
+                self.assertGreater(size, 2 * 1000 * 1000)
+                self.assertLess(peak, 1024 * 1024)
+
+
+class CatalogQueryTests(TestCase):
+    def test_search_vector_is_not_selected(self):
+        caches['default'].clear()
+        service = Service.objects.create(title='Cleaning', price=Decimal('10.00'))
+        client = APIClient(HTTP_HOST='127.0.0.1')
+        for url in ('/api/v1/services/', f'/api/v1/services/{service.pk}/', f'/api/v1/services/{service.pk}/overview/'):
+            with self.subTest(url=url), CaptureQueriesContext(connection) as queries:
+                self.assertEqual(client.get(url).status_code, 200)
+            self.assertTrue(queries.captured_queries)
+            self.assertFalse([query for query in queries.captured_queries if 'search_vector' in query['sql']])
@@ -1,59 +1,139 @@
 # services/views.py
 from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework.utils.urls import replace_query_param
 from .models import Service, Cart, CartItem, Order, OrderItem, Review
-from .serializers import ServiceSerializer, CartSerializer, CartItemSerializer, OrderSerializer, ReviewSerializer
+from .serializers import ServiceSerializer, CartSerializer, CartItemSerializer, OrderSerializer, StaffOrderSerializer, ReviewSerializer, CartBulkOperationSerializer, CartSummarySerializer
 from rest_framework import filters
 from rest_framework import permissions
 from rest_framework import serializers
+from datetime import date, timedelta
 from decimal import Decimal
 from django.db import transaction
 from django.db.models import F
-from django.http import HttpResponseRedirect
-from sslcommerz_lib import SSLCOMMERZ 
+from django.http import HttpResponseRedirect, StreamingHttpResponse
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+import json
+import math
 from django.conf import settings as main_settings
-
-class ServiceViewSet(viewsets.ModelViewSet):
-    queryset = Service.objects.all().order_by('-id')
+from api import throttling
+from api.pagination import KeysetPagination
+from api.search import FullTextSearchFilter
+from api.conditional import ConditionalGetMixin, make_etag, not_modified, set_validators
+from django.db.models import Count, Max, Sum
+from . import cache, callbacks, exports, ratings, rollups
+from .cache import CatalogCacheMixin
+from .checkout import CheckoutService
+from .cart import apply_bulk_operations, get_cart_summary, get_request_cart
+
+class ServiceViewSet(ConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet):
+    # search_vector is only filtered and ranked on in SQL, never serialized
+    queryset = Service.objects.defer('search_vector').order_by('-id')
     serializer_class = ServiceSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]  # Read-only for unauthenticated users
-    # allow sorting by rating: ?ordering=-average_rating
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
-    ordering_fields = ['average_rating','price','created_at']
-    search_fields = ['title','description']
+    pagination_class = KeysetPagination
+    # ranked full-text search: ?q=clean ; sorting by rating: ?ordering=-average_rating
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    ordering_fields = ['average_rating','price','id']
+
+    # the catalog version changes on every Service/Review write, so it is a
+    # free validator and keeps cache hits at zero queries
+    def get_list_validators(self, request, queryset):
+        return make_etag(request.get_full_path(), cache.get_version()), None
+
+    def get_object_validators(self, request, lookup):
+        return make_etag(request.get_full_path(), cache.get_version()), None
+
+    @action(detail=True, methods=['get'])
+    def overview(self, request, pk=None):
+        """
+        Everything a service page needs in one request and 3 queries: the service,
+        the first page of its reviews (newest first; ``next`` continues on
+        /reviews/?service=<id>) and a 1-5 star histogram.
+        """
+        etag = make_etag(request.get_full_path(), cache.get_version())
+        return not_modified(request, etag) or set_validators(
+            self.cached_response(request, 'overview', lambda: self.build_overview(request)), etag)
+
+    def build_overview(self, request):
+        service = self.get_object()
+        paginator = KeysetPagination()
+        reviews = paginator.paginate_queryset(
+            Review.objects.filter(service=service).select_related('user').order_by('-id'), request)
+        # same ordering and cursor format as the reviews list, so paging continues there
+        paginator.base_url = replace_query_param(request.build_absolute_uri(reverse('review-list')),
+                                                 'service', service.pk)
+        if paginator.page_size_query_param in request.query_params:
+            paginator.base_url = replace_query_param(paginator.base_url, paginator.page_size_query_param,
+                                                     paginator.page_size)
+        return Response({
+            'service': self.get_serializer(service).data,
+            'rating_histogram': ratings.histogram(service.pk),
+            'reviews': paginator.get_paginated_response(ReviewSerializer(reviews, many=True).data).data,
+        })
 
 
 class CartMeView(generics.GenericAPIView):
     """
-    GET  /api/v1/cart/      -> return the current user's cart (create if missing)
+    GET  /api/v1/cart/      -> return the current user's cart (unsaved if they have none yet)
+    GET  /api/v1/cart/?view=summary -> lines with slim service fields, subtotals, total and item count
     POST /api/v1/cart/      -> idempotently ensure a cart exists and return it
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = CartSerializer
 
-    def get_object(self):
-        cart, _created = Cart.objects.get_or_create(user=self.request.user)
-        # If you need items preloaded:
-        return Cart.objects.select_related('user').prefetch_related('items').get(pk=cart.pk)
+    def get_object(self, create=False):
+        # carts are created lazily on the first write, a read never inserts
+        return get_request_cart(self.request, create=create) or Cart(user=self.request.user)
+
+    def get_etag(self, request):
+        # the weighted sums tell lines apart, so moving quantity between them (same count and
+        # total) changes the tag too
+        row = (CartItem.objects
+               .filter(cart__user=request.user)
+               .aggregate(count=Count('id'), max_id=Max('id'), total=Sum('quantity'),
+                          by_line=Sum(F('id') * F('quantity')), by_service=Sum(F('service_id') * F('quantity'))))
+        # catalog version covers price/title changes of the services in the cart
+        return make_etag(request.get_full_path(), request.user.pk, row['count'], row['max_id'], row['total'],
+                         row['by_line'], row['by_service'], cache.get_version())
 
     def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        if request.query_params.get('view') == 'summary':
+            summary = CartSummarySerializer(get_cart_summary(request.user)).data
+            return set_validators(Response(summary), etag)
         cart = self.get_object()
-        return Response(self.get_serializer(cart).data)
+        return set_validators(Response(self.get_serializer(cart).data), etag)
 
     def post(self, request, *args, **kwargs):
         # Idempotent "create": always return the user's cart (create if missing)
-        cart = self.get_object()
+        cart = self.get_object(create=True)
         serializer = self.get_serializer(cart)
         return Response(serializer.data, status=status.HTTP_200_OK)
 class CartDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = CartSerializer
-    queryset = Cart.objects.select_related('user').prefetch_related('items')
     lookup_field = 'pk'
 
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Cart.objects.none()
+        return Cart.objects.filter(user=self.request.user)
+
 
 class CartItemViewSet(viewsets.ModelViewSet):
     """
@@ -63,18 +143,24 @@ class CartItemViewSet(viewsets.ModelViewSet):
     update  -> PUT   /api/cart/items/{id}/   { "quantity": <int> }
     partial_update -> PATCH /api/cart/items/{id}/ { "quantity": <int> }
     destroy -> DELETE /api/cart/items/{id}/
+    bulk    -> POST  /api/cart/items/bulk/   [{ "service_id": <int>, "quantity": <int>, "op": "add|set|remove" }, ...]
     """
     permission_classes = [IsAuthenticated]
     serializer_class = CartItemSerializer
 
     def get_queryset(self):
-        # Only return items from the requesting user's cart
-        cart, _ = Cart.objects.get_or_create(user=self.request.user)
-        return CartItem.objects.select_related('service').filter(cart=cart)
-        # Overriding get_queryset per DRF docs is the standard way to filter by user. :contentReference[oaicite:1]{index=1}
+        if getattr(self, 'swagger_fake_view', False):
+            # schema generation (build_schema) has no request user
+            return CartItem.objects.none()
+        # Only return items from the requesting user's cart; joining on cart__user
+        # avoids resolving (or creating) the cart first
+        return (CartItem.objects
+                .select_related('service')
+                .defer('service__search_vector')
+                .filter(cart__user=self.request.user))
 
     def perform_create(self, serializer):
-        # Serializer.create already merges duplicates and uses self.context['request'].user
+        # cart comes from CurrentCartDefault, which creates it on the first add
         serializer.save()
 
     def perform_update(self, serializer):
@@ -87,123 +173,211 @@ class CartItemViewSet(viewsets.ModelViewSet):
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class OrderViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = CartBulkOperationSerializer(data=request.data, many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            cart = get_request_cart(request, create=True)
+            apply_bulk_operations(cart, serializer.validated_data)
+        data = CartSerializer(cart).data
+        data['items'] = CartItemSerializer(self.get_queryset().order_by('id'), many=True).data
+        return Response(data)
+
+class OrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
     queryset = Order.objects.all().order_by('-created_at')
 
     def get_queryset(self):
-        return (Order.objects
-                .filter(user=self.request.user)
-                .prefetch_related('items__service'))
-
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        if getattr(self, 'swagger_fake_view', False):
+            return Order.objects.none()
+        orders = Order.objects.all()
+        if not (self.request.user.is_staff and self.action in ('update', 'partial_update')):
+            orders = orders.filter(user=self.request.user)
+        return orders.prefetch_related('items__service').order_by('-created_at')
+
+    def get_serializer_class(self):
+        # only staff move an order through its statuses; payment_status belongs to the payment flow
+        if getattr(self, 'swagger_fake_view', False):
+            return OrderSerializer
+        if self.request.user.is_staff and self.action in ('update', 'partial_update'):
+            return StaffOrderSerializer
+        return OrderSerializer
 
-        # create order + items
-        self.perform_create(serializer)
-
-        # re-fetch with prefetch so 'items' serialize properly
-        order = (Order.objects
-                 .prefetch_related('items__service')
-                 .get(pk=serializer.instance.pk))
+    def perform_create(self, serializer):
+        # locked, constant-query checkout; the returned order already carries its items
+        serializer.instance = CheckoutService(self.request.user).checkout(**serializer.validated_data)
 
-        out = OrderSerializer(order).data
-        headers = self.get_success_headers(out)
-        return Response(out, status=status.HTTP_201_CREATED, headers=headers)
+    def perform_update(self, serializer):
+        old_status = serializer.instance.status
+        with transaction.atomic():
+            order = serializer.save()
+            rollups.order_status_changed(order, old_status, order.status, items=order.items.all())
 
-    def perform_create(self, serializer):
+    def perform_destroy(self, instance):
         with transaction.atomic():
-            cart = get_object_or_404(Cart, user=self.request.user)
-            cart_items_qs = CartItem.objects.select_related('service').filter(cart=cart)
-            cart_items = list(cart_items_qs)
-            if not cart_items:
-                raise serializers.ValidationError("Cart is empty")
-
-            from decimal import Decimal
-            total_amount = sum((ci.service.price * ci.quantity) for ci in cart_items)
-            total_amount = Decimal(total_amount)
-
-            order = serializer.save(user=self.request.user, total_amount=total_amount)
-
-            OrderItem.objects.bulk_create([
-                OrderItem(
-                    order=order,
-                    service=ci.service,
-                    service_title=ci.service.title,
-                    unit_price=ci.service.price,
-                    quantity=ci.quantity,
-                    subtotal=ci.service.price * ci.quantity
-                ) for ci in cart_items
-            ])
-
-            CartItem.objects.filter(id__in=[ci.id for ci in cart_items]).delete()
+            items = list(instance.items.all())
+            instance.delete()
+            rollups.order_deleted(instance, items)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        """
+        Staff only: every order (not just the caller's) as CSV or JSONL, one row
+        per item, streamed. ?output=csv|jsonl&created_from=2025-01-01&created_to=2025-01-31&status=PENDING,CONFIRMED
+        (``format`` is taken by DRF's format suffix handling, hence ``output``).
+        """
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in exports.FORMATS:
+            return Response({'output': f"Expected one of: {', '.join(exports.FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        filters, errors = exports.parse_filters(request.query_params)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(exports.render(exports.export_rows(filters), fmt),
+                                         content_type=exports.CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="orders.{fmt}"'
+        return response
 class ReviewViewSet(viewsets.ModelViewSet):
-    permission_classes = [IsAuthenticated]
+    # reviews are public (service pages link here), writing one needs an account
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     serializer_class = ReviewSerializer
-    queryset = Review.objects.all()
+    pagination_class = KeysetPagination
+    queryset = Review.objects.all().order_by('-id')
+
+    def get_queryset(self):
+        queryset = Review.objects.select_related('user').order_by('-id')
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset
+        service = self.request.query_params.get('service')
+        if service is not None:
+            if not service.isdigit():
+                raise serializers.ValidationError({'service': "Expected a service id."})
+            queryset = queryset.filter(service_id=service)
+        return queryset
 
     def perform_create(self, serializer):
         # optional: check that user had order with that service and status completed
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            review = serializer.save(user=self.request.user)
+            ratings.review_saved(review)
+            rollups.review_saved(review)
+
+    def perform_update(self, serializer):
+        old_service_id, old_rating = serializer.instance.service_id, serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            ratings.review_saved(review, old_service_id=old_service_id, old_rating=old_rating)
+            rollups.review_saved(review, old_service_id=old_service_id, old_rating=old_rating)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            ratings.review_deleted(instance)
+            rollups.review_deleted(instance)
+
+class SalesAnalyticsView(APIView):
+    """
+    Staff dashboard from the daily rollups (service.rollups), never from orders.
+    GET /api/v1/analytics/sales/?from=2025-01-01&to=2025-01-31&top=10 (default: the last 30 days)
+    """
+    permission_classes = [IsAdminUser]
+    max_days = 366
+
+    def get(self, request):
+        today = timezone.localdate()
+        try:
+            date_to = self._date(request.query_params.get('to')) or today
+            date_from = self._date(request.query_params.get('from')) or date_to - timedelta(days=29)
+            top = min(int(request.query_params.get('top', 10)), 100)
+        except ValueError:
+            return Response({'detail': "Use YYYY-MM-DD dates and an integer top."}, status=status.HTTP_400_BAD_REQUEST)
+        if date_from > date_to or (date_to - date_from).days >= self.max_days:
+            return Response({'detail': f"Pick a range of 1 to {self.max_days} days."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(rollups.dashboard(date_from, date_to, top=top))
+
+    def _date(self, value):
+        return date.fromisoformat(value) if value else None
 
 # payment all views
 
 @api_view(['POST'])
 def initiate_payment(request):
-    user = request.user
-    amount = 100
+    # imported on first use so cold starts don't load the HTTP client stack
+    from .payments import build_session_payload, get_gateway
+
     order_id = request.data.get("order_id")
     num_items = request.data.get("num_items", 1)
 
-    settings = {'store_id': 'phima67ddc8dba290b',
-                'store_pass': 'phima67ddc8dba290b@ssl', 'issandbox': True}
-    sslcz = SSLCOMMERZ(settings)
-    post_body = {}
-    post_body['total_amount'] = amount
-    post_body['currency'] = "BDT"
-    post_body['tran_id'] = f"txn_{order_id}"
-    post_body['success_url'] = f"{main_settings.BACKEND_URL}/api/v1/payment/success/"
-    post_body['fail_url'] = f"{main_settings.BACKEND_URL}/api/v1/payment/fail/"
-    post_body['cancel_url'] = f"{main_settings.BACKEND_URL}/api/v1/payment/cancel/"
-    post_body['emi_option'] = 0
-    post_body['cus_name'] = f"{user.first_name} {user.last_name}"
-    post_body['cus_email'] = user.email
-    post_body['cus_phone'] = user.phone_number
-    post_body['cus_add1'] = user.address
-    post_body['cus_city'] = "Dhaka"
-    post_body['cus_country'] = "Bangladesh"
-    post_body['shipping_method'] = "Courier"
-    post_body['multi_card_name'] = ""
-    post_body['num_of_item'] = num_items
-    post_body['product_name'] = "E-commerce Products"
-    post_body['product_category'] = "General"
-    post_body['product_profile'] = "general"
-
-    response = sslcz.createSession(post_body)  # API response
+    post_body = build_session_payload(request.user, order_id, num_items)
+    response = get_gateway().create_session(post_body)  # API response
 
     if response.get("status") == 'SUCCESS':
         return Response({"payment_url": response['GatewayPageURL']})
     return Response({"error": "Payment initiation failed"}, status=status.HTTP_400_BAD_REQUEST)
 
 
+@csrf_exempt
+@require_POST
+async def initiate_payment_async(request):
+    """
+    ASGI variant of initiate_payment: the gateway round trip is awaited, so a
+    slow gateway parks a coroutine instead of a worker. Same body and JWT auth.
+    """
+    try:
+        # same JWT mode as the DRF views (settings.JWT_AUTH_MODE)
+        authenticator = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]()
+        auth = await sync_to_async(authenticator.authenticate)(request)
+    except AuthenticationFailed as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+        return JsonResponse(detail, status=status.HTTP_401_UNAUTHORIZED)
+    if auth is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided."},
+                            status=status.HTTP_401_UNAUTHORIZED)
+    user, _token = auth
+    wait = await sync_to_async(throttling.check)('initiate-payment', request, user)
+    if wait:
+        response = JsonResponse({"detail": "Request was throttled."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(math.ceil(wait))
+        return response
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON body"}, status=status.HTTP_400_BAD_REQUEST)
+
+    from .payments import build_session_payload, get_gateway
+
+    # off the event loop: phone_number / address are deferred on a stateless-mode user
+    post_body = await sync_to_async(build_session_payload)(user, data.get("order_id"), data.get("num_items", 1))
+    response = await get_gateway().acreate_session(post_body)
+
+    if response.get("status") == 'SUCCESS':
+        return JsonResponse({"payment_url": response['GatewayPageURL']})
+    return JsonResponse({"error": "Payment initiation failed"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _callback_payload(request):
+    # gateway posts form data; keep one value per key for the JSON payload
+    return {key: request.data.get(key) for key in request.data.keys()}
+
+
 @api_view(['POST'])
 def payment_success(request):
-    print("Inside success")
-    order_id = request.data.get("tran_id").split('_')[1]
-    order = Order.objects.get(id=order_id)
-    order.status = "CONFIRMED"
-    order.save()
+    callbacks.ingest(_callback_payload(request), callbacks.SUCCESS)
     return HttpResponseRedirect(f"{main_settings.FRONTEND_URL}/dashboard/ordered/")
 
 
 @api_view(['POST'])
 def payment_cancel(request):
+    callbacks.ingest(_callback_payload(request), callbacks.CANCELLED)
     return HttpResponseRedirect(f"{main_settings.FRONTEND_URL}/dashboard/ordered/")
 
 
 @api_view(['POST'])
 def payment_fail(request):
-    print("Inside fail")
-    return HttpResponseRedirect(f"{main_settings.FRONTEND_URL}/dashboard/ordered/")
\ No newline at end of file
+    callbacks.ingest(_callback_payload(request), callbacks.FAILED)
+    return HttpResponseRedirect(f"{main_settings.FRONTEND_URL}/dashboard/ordered/")
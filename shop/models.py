@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 import cloudinary.models
 
 # Create your models here.
@@ -7,8 +8,13 @@ class Product(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     product_image=cloudinary.models.CloudinaryField('image', blank=True, null=True)
+    # resized URLs keyed by settings.IMAGE_VARIANTS name, filled in by the media.upload job
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # maintained by api.search (GIN indexed on PostgreSQL)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     def __str__(self):
         return self.name
     
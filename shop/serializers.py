@@ -1,7 +1,12 @@
 from shop.models import Product
 from rest_framework import serializers
-class ProductSerializer(serializers.ModelSerializer):
+from api.media import DeferredImageUploadMixin
+from api.metrics import TimedSerializerMixin
+class ProductSerializer(TimedSerializerMixin, DeferredImageUploadMixin, serializers.ModelSerializer):
+    # in deferred upload mode the image is pushed by a worker after the response
+    deferred_image_fields = {'product_image': 'image_variants'}
+
     class Meta:
         # ref_name = 'Product'
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'product_image', 'created_at', 'updated_at']
\ No newline at end of file
+        fields = ['id', 'name', 'description', 'price', 'product_image', 'image_variants', 'created_at', 'updated_at']
\ No newline at end of file
@@ -2,10 +2,16 @@ from django.shortcuts import render
 from rest_framework import viewsets, permissions
 from .models import Product
 from .serializers import ProductSerializer
+from api.pagination import KeysetPagination
+from api.search import FullTextSearchFilter
+from api.conditional import ConditionalGetMixin
 # Create your views here.
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    # search_vector is only filtered and ranked on in SQL, never serialized
+    queryset = Product.objects.defer('search_vector').order_by('-id')
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    filter_backends = [FullTextSearchFilter]
     def perform_create(self, serializer):
         serializer.save()
\ No newline at end of file
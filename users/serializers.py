@@ -1,5 +1,8 @@
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer, UserSerializer as BaseUserSerializer
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer as BaseTokenObtainPairSerializer
+from api.authentication import add_user_claims
+from api.metrics import TimedSerializerMixin
 from .models import  Team, ContactMessage
 
 class UserCreateSerializer(BaseUserCreateSerializer):
@@ -16,12 +19,19 @@ class UserSerializer(BaseUserSerializer):
         
 
         
-class TeamSerializer(serializers.ModelSerializer):
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    # refresh and access tokens carry the claims StatelessJWTAuthentication builds request.user from
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class TeamSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta():
         model = Team
         fields = ['id', 'name', 'members', 'created_at', 'updated_at']
 
-class ContactMessageSerializer(serializers.ModelSerializer):
+class ContactMessageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta():
         model = ContactMessage
         fields = ['id', 'name', 'email', 'subject', 'message', 'created_at']
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api.authentication import invalidate_user
+
+from .models import User
+
+# carried as token claims by the stateless JWT mode, so a change revokes issued tokens
+SECURITY_FIELDS = ('is_active', 'is_staff', 'is_superuser')
+
+
+@receiver(pre_save, sender=User)
+def note_security_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    # set_password() leaves the raw password on _password until the save
+    instance._revoke_tokens = instance._password is not None
+    if instance._revoke_tokens or raw or instance._state.adding:
+        return
+    deferred = instance.get_deferred_fields()
+    fields = [name for name in SECURITY_FIELDS
+              if name not in deferred and (update_fields is None or name in update_fields)]
+    if fields:
+        stored = User.objects.filter(pk=instance.pk).values_list(*fields).first()
+        instance._revoke_tokens = stored is not None and stored != tuple(getattr(instance, name) for name in fields)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    invalidate_user(instance.pk, revoke=getattr(instance, '_revoke_tokens', False))
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk, revoke=True)
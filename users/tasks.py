@@ -0,0 +1,16 @@
+from django.core.mail import mail_admins
+
+from jobs.queue import task
+
+from .models import ContactMessage
+
+
+@task('contact.notify')
+def notify_contact_message(message_id):
+    message = ContactMessage.objects.filter(pk=message_id).first()
+    if message is None:
+        return
+    mail_admins(
+        subject=f"Contact message: {message.subject}",
+        message=f"From {message.name} <{message.email}>\n\n{message.message}",
+    )
@@ -2,6 +2,7 @@ from django.shortcuts import render
 from rest_framework import viewsets, permissions
 from .models import Team, ContactMessage
 from .serializers import TeamSerializer, ContactMessageSerializer
+from jobs.queue import enqueue
 # Create your views here.
 class TeamViewSet(viewsets.ModelViewSet):
     queryset = Team.objects.all()
@@ -11,8 +12,17 @@ class TeamViewSet(viewsets.ModelViewSet):
 class ContactMessageViewSet(viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all()
     serializer_class = ContactMessageSerializer
-    permission_classes = [permissions.AllowAny]
+    # rate limited per IP through THROTTLE_RATES['contactmessage.create']
+    throttle_scope = 'contactmessage'
+
+    def get_permissions(self):
+        # anyone can send a message; reading and managing them is for staff
+        if self.action == 'create':
+            return [permissions.AllowAny()]
+        return [permissions.IsAdminUser()]
 
     def perform_create(self, serializer):
-        serializer.save()   
+        message = serializer.save()
+        # notifying the admins happens on a worker, not in the request
+        enqueue('contact.notify', message_id=message.pk)
 